@@ -1,13 +1,38 @@
 import os
+import json
 import logging
-from flask import Flask, render_template, request, jsonify, make_response
+import click
+from flask import (
+    Flask, render_template, request, jsonify, redirect, url_for,
+    Response, stream_with_context
+)
 from scraper import TGSPDCLScraper
-import pandas as pd
-from io import BytesIO
+from async_scraper import AsyncTGSPDCLScraper
+from dates import parse_date
+from exporter import (
+    export_query, iter_export_rows, stream_csv, stream_file, export_to_file, remove_file,
+    ExportError, EXPORT_FORMATS
+)
+from jobs import ScrapeJobQueue
+from ratelimit import RateLimiter
+from http_cache import PageCache
+from result_cache import ResultCache
+from scheduler import RefreshScheduler
+from singleflight import SingleFlight
+from metrics import registry as metrics_registry, timed, record_cache, STAGE_SECONDS, TASKS
+from migrations import upgrade_schema
+from queries import (
+    bills_for_service_number, bills_by_service_number,
+    service_number_exists, service_number_summaries, service_number_to_dict, parse_fields,
+    bill_page, service_number_page, iter_bills, iter_service_numbers,
+    DEFAULT_BILL_FIELDS, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+)
 import time
-from models import db, ServiceNumber, BillHistory, ScrapingLog
-from datetime import datetime, timedelta
-import json
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from models import db, ServiceNumber, BillHistory, ScrapingLog, ScrapeLease
+from datetime import date, datetime, timedelta, timezone
+import uuid
 
 # Configure logging
 logging.basicConfig(level=logging.DEBUG)
@@ -33,9 +58,30 @@ app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 # Initialize database
 db.init_app(app)
 
-# Create tables
+# Create tables and apply schema upgrades to existing ones
 with app.app_context():
     db.create_all()
+    upgrade_schema(db)
+
+# Columns written by the bulk bill insert
+BULK_INSERT_COLUMNS = (
+    'service_number_id', 'bill_number', 'bill_date', 'amount',
+    'status', 'source_website', 'raw_data', 'created_at'
+)
+
+# ScrapingLog statuses that end a queued scrape task
+JOB_DONE_STATUSES = ('success', 'cached')
+JOB_FAILED_STATUSES = ('no_data', 'error')
+
+# A running task whose number has no live scrape lease for this long was
+# interrupted, e.g. by a restart, and will never finish
+INTERRUPTED_TASK_GRACE_SECONDS = 60
+INTERRUPTED_TASK_MESSAGE = "Interrupted before it finished; please scrape again"
+
+# How often a job's event stream checks for finished numbers, and how long
+# it may stay quiet before sending a keep-alive comment
+JOB_STREAM_POLL_SECONDS = 1.0
+JOB_STREAM_KEEPALIVE_SECONDS = 15.0
 
 @app.route('/')
 def index():
@@ -51,246 +97,806 @@ def get_or_create_service_number(service_number):
         db.session.commit()
     return service_entry
 
-def save_bill_to_database(service_entry, bill_data, source_website):
-    """Save a bill to the database"""
-    try:
-        # Parse date if available
-        bill_date = None
-        if bill_data.get('date'):
-            try:
-                # Try different date formats
-                date_str = bill_data['date']
-                for fmt in ['%d/%m/%Y', '%d-%m-%Y', '%Y-%m-%d', '%d-%m-%y']:
-                    try:
-                        bill_date = datetime.strptime(date_str, fmt).date()
-                        break
-                    except ValueError:
-                        continue
-            except:
-                pass
+def insert_ignoring_conflicts(table, index_elements):
+    """INSERT for table that skips rows clashing on index_elements where the dialect supports it"""
+    dialect = db.engine.dialect
+    if dialect.name == 'postgresql':
+        return postgresql_insert(table).on_conflict_do_nothing(index_elements=index_elements)
+    if dialect.name == 'sqlite':
+        return sqlite_insert(table).on_conflict_do_nothing(index_elements=index_elements)
+    return db.insert(table)
+
+def resolve_service_numbers(service_numbers):
+    """
+    Map a batch of service numbers to ServiceNumber ids, creating the missing
+    ones. Existing rows are read with one IN query and the rest are added
+    with one multi-row INSERT, instead of a SELECT and COMMIT per number.
+    """
+    numbers = list(dict.fromkeys(service_numbers))
+    if not numbers:
+        return {}
+    
+    select_ids = db.select(ServiceNumber.service_number, ServiceNumber.id)
+    ids = dict(db.session.execute(select_ids.where(ServiceNumber.service_number.in_(numbers))).all())
+    
+    missing = [service_number for service_number in numbers if service_number not in ids]
+    if missing:
+        created_at = datetime.utcnow()
+        # Another request may create some of these first; those rows are
+        # skipped and picked up by the re-read below
+        db.session.execute(
+            insert_ignoring_conflicts(ServiceNumber.__table__, ['service_number']),
+            [{'service_number': service_number, 'created_at': created_at} for service_number in missing]
+        )
+        db.session.commit()
+        ids.update(db.session.execute(select_ids.where(ServiceNumber.service_number.in_(missing))).all())
+    
+    return ids
+
+def save_bills_to_database(service_number_id, bills):
+    """
+    Store a scraped bill history with a single INSERT ... SELECT statement.
+    
+    Bills already stored for the service number (same date and amount, with
+    missing dates treated as equal) are skipped in SQL, and ON CONFLICT DO
+    NOTHING on the unique_bill constraint covers concurrent writers.
+    Returns (inserted rows as (id, bill_date, amount), skipped count).
+    """
+    table = BillHistory.__table__
+    created_at = datetime.utcnow()
+    
+    rows = {}
+    for bill in bills:
+        # The scraper parses each date once; fall back to parsing here for
+        # bills that did not come through it
+        bill_date = bill.get('bill_date') or parse_date(bill.get('date'))
+        key = (bill_date, bill.get('amount'))
+        if key in rows:
+            continue
+        rows[key] = {
+            'service_number_id': service_number_id,
+            'bill_number': bill.get('bill_number'),
+            'bill_date': bill_date,
+            'amount': bill.get('amount'),
+            'status': bill.get('status'),
+            'source_website': bill.get('source', 'scraped'),
+            'raw_data': {key: value for key, value in bill.items() if key != 'bill_date'},
+            'created_at': created_at
+        }
+    
+    if not rows:
+        return [], len(bills)
+    
+    columns = list(BULK_INSERT_COLUMNS)
+    selects = [
+        db.select(*[db.literal(row[name], table.c[name].type).label(name) for name in columns])
+        for row in rows.values()
+    ]
+    incoming = (db.union_all(*selects) if len(selects) > 1 else selects[0]).subquery('incoming')
+    
+    already_stored = db.select(table.c.id).where(
+        table.c.service_number_id == incoming.c.service_number_id,
+        table.c.bill_date.is_not_distinct_from(incoming.c.bill_date),
+        table.c.amount.is_not_distinct_from(incoming.c.amount)
+    ).exists()
+    source = db.select(*[incoming.c[name] for name in columns]).where(~already_stored)
+    
+    stmt = insert_ignoring_conflicts(table, ['service_number_id', 'bill_date', 'amount']).from_select(columns, source)
+    
+    if db.engine.dialect.insert_returning:
+        result = db.session.execute(stmt.returning(table.c.id, table.c.bill_date, table.c.amount))
+        inserted = result.all()
+        return inserted, len(bills) - len(inserted)
+    
+    result = db.session.execute(stmt)
+    return [], len(bills) - max(result.rowcount, 0)
+
+def parse_service_numbers(raw_text):
+    """Parse service numbers from textarea input (split by newlines and commas)"""
+    numbers = []
+    for line in raw_text.split('\n'):
+        line = line.strip()
+        if line:
+            # Split by comma if multiple numbers on same line
+            numbers.extend([num.strip() for num in line.split(',') if num.strip()])
+    
+    # Drop repeated numbers but keep the order they were entered in
+    return list(dict.fromkeys(numbers))
+
+def scrape_service_number(service_number, job_id=None, service_number_id=None):
+    """
+    Scrape and store one service number, unless a fresh result turns up
+    first. Each website scraped gets its own ScrapingLog row. Pass the
+    number's ServiceNumber id when it was resolved at queue time. Returns
+    (log status, bills found, error message).
+    """
+    # Another task may have scraped this number since it was queued
+    cached = cached_results([service_number]).get(service_number)
+    if cached is not None:
+        logger.info(f"Using cached data for service number: {service_number}")
+        return 'cached', len(cached), None
+    
+    # Rows queued before ids were resolved up front look the number up here
+    if service_number_id is None:
+        service_number_id = get_or_create_service_number(service_number).id
+    
+    # Scrape new data
+    site_runs = []
+    bill_history = scraper.get_bill_history(service_number, site_runs=site_runs)
+    
+    db.session.add_all([
+        ScrapingLog(
+            service_number=service_number, service_number_id=service_number_id, job_id=job_id,
+            website=run.website, status=run.status,
+            bills_found=run.bills_found, scraping_duration=run.duration,
+            error_message='; '.join(run.errors[:5]) or None
+        )
+        for run in site_runs
+    ])
+    
+    with timed('db_write'):
+        if bill_history:
+            # Save bills to database in one statement
+            inserted, skipped = save_bills_to_database(service_number_id, bill_history)
+            
+            # Update last scraped time
+            db.session.execute(
+                db.update(ServiceNumber)
+                .where(ServiceNumber.id == service_number_id)
+                .values(last_scraped=datetime.utcnow())
+            )
+            logger.info(f"Saved {len(inserted)} new bills ({skipped} already stored) for service number: {service_number}")
+            result = ('success', len(bill_history), None)
+        else:
+            result = ('no_data', 0, "No bill history found")
         
-        # Check if bill already exists
-        existing_bill = BillHistory.query.filter_by(
-            service_number_id=service_entry.id,
-            bill_date=bill_date,
-            amount=bill_data.get('amount')
-        ).first()
+        # Commit before other tasks waiting on this scrape look for its result.
+        # A new scrape replaces whatever was cached; the next read reloads it.
+        db.session.commit()
+    result_cache.invalidate(service_number)
+    return result
+
+def scrape_wait_timed_out(service_number):
+    """
+    Outcome for a task that gave up waiting on another process's scrape of
+    the same number: its result if it has landed, an error otherwise
+    """
+    cached = cached_results([service_number]).get(service_number)
+    if cached is not None:
+        return 'cached', len(cached), None
+    return 'error', 0, "Another worker is still scraping this number; please try again shortly"
+
+def run_scrape_task(log_id):
+    """Scrape a single queued service number and record the outcome on its ScrapingLog row"""
+    log_entry = db.session.get(ScrapingLog, log_id)
+    if not log_entry:
+        logger.error(f"Scrape task {log_id} has no log entry")
+        return
+    
+    # Claim the task; it may have been queued again by a process picking up
+    # after a restart, and only one worker should run it
+    claimed = db.session.execute(
+        db.update(ScrapingLog)
+        .where(ScrapingLog.id == log_id, ScrapingLog.status == 'queued')
+        .values(status='running', started_at=datetime.utcnow())
+    ).rowcount
+    db.session.commit()
+    if not claimed:
+        logger.info(f"Scrape task {log_id} was already taken")
+        return
+    db.session.refresh(log_entry)
+    
+    service_number = log_entry.service_number
+    logger.info(f"Scraping data for service number: {service_number}")
+    start_time = time.time()
+    
+    try:
+        # Concurrent tasks for the same number, in this or another process,
+        # share one scrape instead of each running their own
+        (status, bills_found, error_message), shared = scrape_flights.run(
+            service_number,
+            lambda: scrape_service_number(service_number, log_entry.job_id, log_entry.service_number_id),
+            on_timeout=lambda: scrape_wait_timed_out(service_number)
+        )
         
-        if not existing_bill:
-            new_bill = BillHistory(
-                service_number_id=service_entry.id,
-                bill_number=bill_data.get('bill_number'),
-                bill_date=bill_date,
-                amount=bill_data.get('amount'),
-                status=bill_data.get('status'),
-                source_website=source_website,
-                raw_data=json.dumps(bill_data)
-            )
-            db.session.add(new_bill)
-            return True
-        return False
+        if shared and status == 'success':
+            # Another task scraped it while this one waited
+            status = 'cached'
+        log_entry.status = status
+        log_entry.bills_found = bills_found
+        log_entry.error_message = error_message
+    
     except Exception as e:
-        logger.error(f"Error saving bill to database: {str(e)}")
-        return False
+        logger.error(f"Error scraping {service_number}: {str(e)}")
+        db.session.rollback()
+        log_entry = db.session.get(ScrapingLog, log_id)
+        log_entry.status = 'error'
+        log_entry.error_message = str(e)
+        log_entry.bills_found = 0
+    
+    log_entry.scraping_duration = time.time() - start_time
+    db.session.commit()
+    
+    STAGE_SECONDS.observe(log_entry.scraping_duration, stage='task')
+    TASKS.inc(status=log_entry.status)
+
+# Shared scraper and worker pool for queued scrape jobs. Upstream politeness
+# comes from the per-host rate limiter, optionally shared across processes.
+rate_limiter = RateLimiter.from_config(
+    spec=os.environ.get("SCRAPER_RATE_LIMITS"),
+    db_path=os.environ.get("SCRAPER_RATE_LIMIT_DB")
+)
+
+# Fetched pages are revalidated against an on-disk cache so unchanged pages
+# are not parsed again; set SCRAPER_PAGE_CACHE_DB to an empty value to disable
+page_cache_path = os.environ.get("SCRAPER_PAGE_CACHE_DB", os.path.join(app.instance_path, "page_cache.db"))
+page_cache = None
+if page_cache_path:
+    os.makedirs(os.path.dirname(os.path.abspath(page_cache_path)), exist_ok=True)
+    page_cache = PageCache(page_cache_path)
+
+# SCRAPER_BACKEND=async drives requests from one event loop on httpx
+# instead of a thread per site; job workers all submit to that loop
+scraper_options = {
+    'rate_limiter': rate_limiter,
+    'page_cache': page_cache,
+    # Result pages are parsed in this many worker processes; 0 parses inline
+    'parse_workers': int(os.environ.get("SCRAPER_PARSE_WORKERS", "0")),
+}
+if os.environ.get("SCRAPER_BACKEND") == "async":
+    scraper = AsyncTGSPDCLScraper(**scraper_options)
+else:
+    scraper = TGSPDCLScraper(**scraper_options)
+job_queue = ScrapeJobQueue(app, run_scrape_task, workers=int(os.environ.get("SCRAPE_WORKERS", "4")))
+
+def queue_scrape_job(service_numbers):
+    """Queue a scrape job for the given numbers and return its id"""
+    service_number_ids = resolve_service_numbers(service_numbers)
+    job_id = uuid.uuid4().hex
+    log_entries = [
+        ScrapingLog(
+            service_number=service_number, service_number_id=service_number_ids[service_number],
+            job_id=job_id, status='queued'
+        )
+        for service_number in service_numbers
+    ]
+    db.session.add_all(log_entries)
+    db.session.commit()
+    
+    job_queue.submit([log_entry.id for log_entry in log_entries])
+    return job_id
+
+def expire_interrupted_tasks(job_id=None):
+    """
+    Mark running tasks as errors when nothing is scraping them any more.
+    
+    A running task's scrape holds the lease for its number (see
+    singleflight), so a task that has been running for a while with no
+    live lease belonged to a process that stopped. Limited to one job when
+    job_id is given. Returns the number of tasks marked.
+    """
+    now = datetime.utcnow()
+    live_lease = db.select(ScrapeLease.key).where(
+        ScrapeLease.key == ScrapingLog.service_number, ScrapeLease.expires_at > now
+    ).exists()
+    query = (
+        db.update(ScrapingLog)
+        .where(
+            ScrapingLog.status == 'running',
+            ScrapingLog.website.is_(None),
+            db.or_(
+                ScrapingLog.started_at.is_(None),
+                ScrapingLog.started_at < now - timedelta(seconds=INTERRUPTED_TASK_GRACE_SECONDS)
+            ),
+            ~live_lease
+        )
+        .values(status='error', error_message=INTERRUPTED_TASK_MESSAGE, bills_found=0)
+    )
+    if job_id is not None:
+        query = query.where(ScrapingLog.job_id == job_id)
+    
+    expired = db.session.execute(query, execution_options={'synchronize_session': False}).rowcount
+    db.session.commit()
+    if expired:
+        logger.warning(f"Marked {expired} interrupted scrape tasks as errors")
+    return expired
+
+def recover_scrape_tasks():
+    """
+    Pick up tasks left by a process that stopped (a deploy, gunicorn
+    max-requests or --reload): queued tasks are queued again here and
+    interrupted running ones are marked as errors. Tasks still queued in a
+    live process may be queued twice; whichever worker claims one first
+    runs it.
+    """
+    expire_interrupted_tasks()
+    log_ids = db.session.execute(
+        db.select(ScrapingLog.id)
+        .where(ScrapingLog.status == 'queued', ScrapingLog.website.is_(None))
+        .order_by(ScrapingLog.id)
+    ).scalars().all()
+    if log_ids:
+        logger.info(f"Requeueing {len(log_ids)} scrape tasks left queued")
+        job_queue.submit(log_ids)
+
+_recovered_pid = None
+
+@app.before_request
+def recover_scrape_tasks_once():
+    # Once per process, on its first request, so the worker threads live in
+    # the serving process (gunicorn forks workers after importing the app)
+    global _recovered_pid
+    if _recovered_pid != os.getpid():
+        _recovered_pid = os.getpid()
+        try:
+            recover_scrape_tasks()
+        except Exception as e:
+            logger.error(f"Error recovering scrape tasks: {str(e)}")
+            db.session.rollback()
+
+# Background refresh of tracked numbers, queued through the same job queue.
+# Enable it in one process with REFRESH_SCHEDULER=1, or run "flask refresh-stale".
+refresh_scheduler = RefreshScheduler(
+    app, queue_scrape_job,
+    stale_after=timedelta(hours=float(os.environ.get("REFRESH_STALE_HOURS", "24"))),
+    due_stale_after=timedelta(hours=float(os.environ.get("REFRESH_DUE_STALE_HOURS", "6"))),
+    interval=int(os.environ.get("REFRESH_INTERVAL", "60")),
+    busy=lambda: job_queue.pending_count() > 0
+)
+
+@app.before_request
+def start_refresh_scheduler():
+    # Started on first request so the thread lives in the serving process
+    if os.environ.get("REFRESH_SCHEDULER") == "1":
+        refresh_scheduler.start()
+
+@app.cli.command('refresh-stale')
+@click.option('--limit', type=click.IntRange(min=0), default=None, help='Numbers to refresh (default: one scheduler batch)')
+def refresh_stale_command(limit):
+    """Refresh the stalest tracked service numbers and wait for them to finish"""
+    job_id, numbers = refresh_scheduler.run_once(limit)
+    if not numbers:
+        click.echo("No stale service numbers")
+        return
+    
+    click.echo(f"Refreshing {len(numbers)} service numbers (job {job_id})")
+    job_queue.join()
+    
+    counts = {}
+    for log in ScrapingLog.query.filter_by(job_id=job_id, website=None):
+        counts[log.status] = counts.get(log.status, 0) + 1
+    click.echo(', '.join(f"{status}: {count}" for status, count in sorted(counts.items())))
+
+# Coalesces concurrent scrapes of the same number across threads and processes
+scrape_flights = SingleFlight()
+
+# Fresh per-number results, optionally shared across processes
+result_cache = ResultCache.from_config(
+    ttl=os.environ.get("RESULT_CACHE_TTL"),
+    db_path=os.environ.get("RESULT_CACHE_DB")
+)
+
+def cached_results(service_numbers):
+    """
+    {service number: bill dicts} for the numbers scraped within the cache TTL.
+    
+    Served from the result cache; numbers it does not hold but that were
+    scraped recently (e.g. before a restart) are loaded from the database in
+    one query and cached.
+    """
+    found = result_cache.get_many(service_numbers)
+    misses = [service_number for service_number in service_numbers if service_number not in found]
+    record_cache('result', 'hit', len(found))
+    if not misses:
+        return found
+    
+    cutoff = datetime.utcnow() - timedelta(seconds=result_cache.ttl)
+    fresh = db.session.execute(
+        db.select(ServiceNumber.service_number, ServiceNumber.last_scraped).where(
+            ServiceNumber.service_number.in_(misses),
+            ServiceNumber.last_scraped > cutoff
+        )
+    ).all()
+    
+    if fresh:
+        bills = bills_by_service_number([row.service_number for row in fresh])
+        for row in fresh:
+            scraped_at = row.last_scraped.replace(tzinfo=timezone.utc).timestamp()
+            result_cache.set(row.service_number, bills[row.service_number], scraped_at=scraped_at)
+            found[row.service_number] = bills[row.service_number]
+    
+    record_cache('result', 'database', len(fresh))
+    record_cache('result', 'miss', len(misses) - len(fresh))
+    return found
+
+def wants_json():
+    """True when the client asked for JSON rather than an HTML page"""
+    accept = request.accept_mimetypes
+    return accept.accept_json and not accept.accept_html
+
+def finished_bills(service_numbers, fields=DEFAULT_BILL_FIELDS):
+    """
+    {service number: bill dicts} for finished numbers, from the result cache
+    when it holds the requested shape and from one joined query otherwise
+    """
+    found = cached_results(service_numbers) if list(fields) == list(DEFAULT_BILL_FIELDS) else {}
+    found.update(bills_by_service_number([number for number in service_numbers if number not in found], fields))
+    return {service_number: found[service_number] for service_number in service_numbers}
+
+def collect_job_results(job_id, fields=DEFAULT_BILL_FIELDS):
+    """Build per-number progress and partial results for a job from its ScrapingLog rows"""
+    expire_interrupted_tasks(job_id)
+    logs = ScrapingLog.query.filter_by(job_id=job_id, website=None).order_by(ScrapingLog.id).all()
+    
+    errors = {}
+    pending = []
+    
+    results = finished_bills([log.service_number for log in logs if log.status in JOB_DONE_STATUSES], fields)
+    
+    for log in logs:
+        if log.status in JOB_DONE_STATUSES:
+            continue
+        elif log.status in JOB_FAILED_STATUSES:
+            errors[log.service_number] = log.error_message or log.status
+        else:
+            pending.append(log.service_number)
+    
+    return logs, results, errors, pending
 
 @app.route('/scrape', methods=['POST'])
 def scrape_bills():
-    """Scrape bill history for provided service numbers"""
+    """Queue a scrape job for the provided service numbers"""
     try:
         service_numbers = request.form.get('service_numbers', '').strip()
         
         if not service_numbers:
+            if wants_json():
+                return jsonify({'error': 'Please provide at least one service number'}), 400
             return render_template('results.html', 
                                  error="Please provide at least one service number")
         
-        # Parse service numbers from textarea (split by newlines and commas)
-        numbers = []
-        for line in service_numbers.split('\n'):
-            line = line.strip()
-            if line:
-                # Split by comma if multiple numbers on same line
-                numbers.extend([num.strip() for num in line.split(',') if num.strip()])
+        numbers = parse_service_numbers(service_numbers)
         
         if not numbers:
+            if wants_json():
+                return jsonify({'error': 'Please provide valid service numbers'}), 400
             return render_template('results.html', 
                                  error="Please provide valid service numbers")
         
-        # Initialize scraper
-        scraper = TGSPDCLScraper()
+        # Create any new service numbers up front in one statement; tasks
+        # get the ids on their ScrapingLog rows and never look them up
+        service_number_ids = resolve_service_numbers(numbers)
         
-        # Scrape data for each service number
-        results = {}
-        errors = {}
+        # Numbers with a fresh cached result finish immediately
+        cached = cached_results(numbers)
         
+        # One ScrapingLog row per number doubles as the job's progress record
+        job_id = uuid.uuid4().hex
+        log_entries = []
         for service_number in numbers:
-            logger.info(f"Scraping data for service number: {service_number}")
-            start_time = time.time()
-            
-            try:
-                # Get or create service number in database
-                service_entry = get_or_create_service_number(service_number)
-                
-                # Check if we have recent data (within last 6 hours)
-                recent_cutoff = datetime.utcnow() - timedelta(hours=6)
-                recent_bills = BillHistory.query.filter(
-                    BillHistory.service_number_id == service_entry.id,
-                    BillHistory.created_at > recent_cutoff
-                ).all()
-                
-                # If we have recent data, use it instead of scraping
-                if recent_bills and service_entry.last_scraped and service_entry.last_scraped > recent_cutoff:
-                    logger.info(f"Using cached data for service number: {service_number}")
-                    all_bills = BillHistory.query.filter_by(service_number_id=service_entry.id).order_by(BillHistory.bill_date.desc()).all()
-                    results[service_number] = [bill.to_dict() for bill in all_bills]
-                else:
-                    # Scrape new data
-                    bill_history = scraper.get_bill_history(service_number)
-                    
-                    if bill_history:
-                        # Save bills to database
-                        new_bills_count = 0
-                        for bill in bill_history:
-                            if save_bill_to_database(service_entry, bill, bill.get('source', 'scraped')):
-                                new_bills_count += 1
-                        
-                        # Update last scraped time
-                        service_entry.last_scraped = datetime.utcnow()
-                        db.session.commit()
-                        
-                        # Get all bills from database for this service number
-                        all_bills = BillHistory.query.filter_by(service_number_id=service_entry.id).order_by(BillHistory.bill_date.desc()).all()
-                        results[service_number] = [bill.to_dict() for bill in all_bills]
-                        
-                        # Log scraping activity
-                        log_entry = ScrapingLog(
-                            service_number=service_number,
-                            status='success',
-                            bills_found=len(bill_history),
-                            scraping_duration=time.time() - start_time
-                        )
-                        db.session.add(log_entry)
-                        db.session.commit()
-                        
-                        logger.info(f"Saved {new_bills_count} new bills for service number: {service_number}")
-                    else:
-                        errors[service_number] = "No bill history found"
-                        
-                        # Log error
-                        log_entry = ScrapingLog(
-                            service_number=service_number,
-                            status='no_data',
-                            bills_found=0,
-                            scraping_duration=time.time() - start_time
-                        )
-                        db.session.add(log_entry)
-                        db.session.commit()
-                        
-            except Exception as e:
-                logger.error(f"Error scraping {service_number}: {str(e)}")
-                errors[service_number] = str(e)
-                
-                # Log error
-                log_entry = ScrapingLog(
-                    service_number=service_number,
-                    status='error',
-                    error_message=str(e),
-                    bills_found=0,
-                    scraping_duration=time.time() - start_time
-                )
-                db.session.add(log_entry)
-                db.session.commit()
-            
-            # Add delay between requests to be respectful
-            time.sleep(1)
+            if service_number in cached:
+                log_entries.append(ScrapingLog(
+                    service_number=service_number, service_number_id=service_number_ids[service_number],
+                    job_id=job_id, status='cached',
+                    bills_found=len(cached[service_number]), scraping_duration=0.0
+                ))
+            else:
+                log_entries.append(ScrapingLog(
+                    service_number=service_number, service_number_id=service_number_ids[service_number],
+                    job_id=job_id, status='queued'
+                ))
+        db.session.add_all(log_entries)
+        db.session.commit()
+        
+        job_queue.submit([log_entry.id for log_entry in log_entries if log_entry.status == 'queued'])
+        logger.info(f"Queued job {job_id} for {len(numbers)} service numbers ({len(cached)} cached)")
+        
+        if wants_json():
+            return jsonify({
+                'job_id': job_id,
+                'status_url': url_for('get_job_api', job_id=job_id),
+                'total': len(numbers)
+            }), 202
+        
+        return redirect(url_for('job_results', job_id=job_id))
+    
+    except Exception as e:
+        logger.error(f"Error in scrape_bills: {str(e)}")
+        if wants_json():
+            return jsonify({'error': str(e)}), 500
+        return render_template('results.html', 
+                             error=f"An error occurred: {str(e)}")
+
+@app.route('/jobs/<job_id>')
+def job_results(job_id):
+    """Results page for a scrape job, showing partial results while it runs"""
+    try:
+        logs, results, errors, pending = collect_job_results(job_id)
+        
+        if not logs:
+            return render_template('results.html', error="Scrape job not found")
         
         return render_template('results.html', 
                              results=results, 
                              errors=errors,
-                             service_numbers=numbers)
+                             pending=pending,
+                             job_id=job_id,
+                             service_numbers=[log.service_number for log in logs])
     
     except Exception as e:
-        logger.error(f"Error in scrape_bills: {str(e)}")
+        logger.error(f"Error in job_results: {str(e)}")
         return render_template('results.html', 
                              error=f"An error occurred: {str(e)}")
 
-@app.route('/export/<service_number>')
-def export_data(service_number):
-    """Export bill history data to Excel from database"""
-    try:
-        # Get service number from database
-        service_entry = ServiceNumber.query.filter_by(service_number=service_number).first()
+def job_events(job_id):
+    """
+    Server-sent events for a job: one "result" event per service number as
+    it finishes (including those already finished), then a "done" event
+    """
+    sent = set()
+    last_sent = time.time()
+    yield "retry: 3000\n\n"
+    
+    while True:
+        expire_interrupted_tasks(job_id)
+        logs = db.session.execute(
+            db.select(ScrapingLog.service_number, ScrapingLog.status, ScrapingLog.error_message,
+                      ScrapingLog.bills_found)
+            .where(ScrapingLog.job_id == job_id, ScrapingLog.website.is_(None))
+        ).all()
+        finished = [
+            log for log in logs
+            if log.status in JOB_DONE_STATUSES + JOB_FAILED_STATUSES and log.service_number not in sent
+        ]
+        results = finished_bills([log.service_number for log in finished if log.status in JOB_DONE_STATUSES])
+        pending = sum(1 for log in logs if log.status not in JOB_DONE_STATUSES + JOB_FAILED_STATUSES)
+        # End the read transaction so the next poll sees new commits
+        db.session.rollback()
         
-        if not service_entry:
-            return jsonify({'error': 'Service number not found in database'}), 404
+        for log in finished:
+            event = {
+                'service_number': log.service_number,
+                'status': log.status,
+                'bills_found': log.bills_found,
+                'pending': pending
+            }
+            if log.status in JOB_DONE_STATUSES:
+                bills = results[log.service_number]
+                event['bills'] = bills
+                event['html'] = render_template('_bill_card.html', service_number=log.service_number, bills=bills)
+            else:
+                event['error'] = log.error_message or log.status
+            sent.add(log.service_number)
+            last_sent = time.time()
+            yield f"event: result\ndata: {json.dumps(event)}\n\n"
         
-        # Get all bills for this service number from database
-        bills = BillHistory.query.filter_by(service_number_id=service_entry.id).order_by(BillHistory.bill_date.desc()).all()
+        if not pending:
+            yield f"event: done\ndata: {json.dumps({'job_id': job_id, 'total': len(logs)})}\n\n"
+            return
         
-        if not bills:
-            return jsonify({'error': 'No bill history found for this service number'}), 404
+        if time.time() - last_sent >= JOB_STREAM_KEEPALIVE_SECONDS:
+            last_sent = time.time()
+            yield ": keep-alive\n\n"
+        time.sleep(JOB_STREAM_POLL_SECONDS)
+
+@app.route('/jobs/<job_id>/stream')
+def job_stream(job_id):
+    """Stream a job's results as server-sent events as each number finishes"""
+    if not db.session.execute(db.select(ScrapingLog.id).where(ScrapingLog.job_id == job_id).limit(1)).first():
+        return jsonify({'error': 'Job not found'}), 404
+    
+    response = Response(stream_with_context(job_events(job_id)), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    # Stop reverse proxies such as nginx from buffering the stream
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@app.route('/api/jobs/<job_id>')
+def get_job_api(job_id):
+    """Get per-number progress and partial results for a scrape job"""
+    try:
+        try:
+            fields = parse_fields(request.args.get('fields'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        # Convert to DataFrame
-        bill_data = []
-        for bill in bills:
-            bill_data.append({
-                'Service Number': service_number,
-                'Bill Number': bill.bill_number or 'N/A',
-                'Bill Date': bill.bill_date.strftime('%Y-%m-%d') if bill.bill_date else 'N/A',
-                'Amount': bill.amount or 'N/A',
-                'Status': bill.status or 'N/A',
-                'Source Website': bill.source_website or 'N/A',
-                'Scraped On': bill.created_at.strftime('%Y-%m-%d %H:%M:%S')
-            })
+        logs, results, errors, pending = collect_job_results(job_id, fields)
         
-        df = pd.DataFrame(bill_data)
+        if not logs:
+            return jsonify({'error': 'Job not found'}), 404
         
-        # Create Excel file in memory
-        output = BytesIO()
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            df.to_excel(writer, sheet_name=f'Bills_{service_number}', index=False)
+        return jsonify({
+            'job_id': job_id,
+            'status': 'running' if pending else 'complete',
+            'total': len(logs),
+            'completed': len(logs) - len(pending),
+            'service_numbers': [{
+                'service_number': log.service_number,
+                'status': log.status,
+                'bills_found': log.bills_found,
+                'error': log.error_message,
+                'duration': log.scraping_duration
+            } for log in logs],
+            'results': results,
+            'errors': errors
+        })
+    except Exception as e:
+        logger.error(f"Error fetching job {job_id}: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+def export_response(query, export_format, filename, sheet_name='Bills'):
+    """
+    Stream an export of the query's rows in the requested format. CSV is
+    written as rows are read; xlsx and parquet need a complete file, so they
+    are built in a temporary file first and that file is streamed.
+    """
+    content_type, extension = EXPORT_FORMATS[export_format]
+    
+    path = None
+    if export_format == 'csv':
+        body = stream_with_context(stream_csv(iter_export_rows(query)))
+    else:
+        path = export_to_file(iter_export_rows(query), export_format, sheet_name)
+        body = stream_file(path)
+    
+    response = Response(body, mimetype=content_type)
+    response.headers['Content-Disposition'] = f'attachment; filename={filename}.{extension}'
+    if path:
+        # Runs however the response ends, including a client that
+        # disconnects before the first chunk is sent
+        response.call_on_close(lambda: remove_file(path))
+    return response
+
+def export_format_arg(default='xlsx'):
+    export_format = (request.values.get('format') or default).lower()
+    if export_format not in EXPORT_FORMATS:
+        raise ExportError(f"Unsupported export format: {export_format}. Use one of: {', '.join(EXPORT_FORMATS)}")
+    return export_format
+
+@app.route('/export/<service_number>')
+def export_data(service_number):
+    """Export bill history data to Excel (or ?format=csv/parquet) from database"""
+    try:
+        export_format = export_format_arg()
+        query = export_query([service_number])
+        
+        if not db.session.execute(query.limit(1)).first():
+            if not service_number_exists(service_number):
+                return jsonify({'error': 'Service number not found in database'}), 404
+            return jsonify({'error': 'No bill history found for this service number'}), 404
         
-        output.seek(0)
+        return export_response(query, export_format, f'bills_{service_number}', f'Bills_{service_number}')
+    
+    except ExportError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error exporting data: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/export', methods=['GET', 'POST'])
+def export_bulk():
+    """
+    Export bills for many service numbers at once, streamed from the database.
+    
+    service_numbers: comma or newline separated (all accounts when omitted)
+    start, end: optional bill date range (YYYY-MM-DD)
+    format: xlsx (default), csv or parquet
+    """
+    try:
+        export_format = export_format_arg()
+        numbers = parse_service_numbers(request.values.get('service_numbers', ''))
         
-        # Create response
-        response = make_response(output.read())
-        response.headers['Content-Type'] = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        response.headers['Content-Disposition'] = f'attachment; filename=bills_{service_number}.xlsx'
+        try:
+            start = date.fromisoformat(request.values['start']) if request.values.get('start') else None
+            end = date.fromisoformat(request.values['end']) if request.values.get('end') else None
+        except ValueError:
+            return jsonify({'error': 'start and end must be dates in YYYY-MM-DD format'}), 400
         
-        return response
+        query = export_query(numbers or None, start, end)
+        filename = f'bills_{datetime.utcnow().strftime("%Y%m%d_%H%M%S")}'
+        return export_response(query, export_format, filename)
     
+    except ExportError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         logger.error(f"Error exporting data: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+def page_args():
+    """
+    Read limit/cursor query parameters. Returns None when neither is given
+    (unpaginated response); raises ValueError for a bad limit.
+    """
+    if 'limit' not in request.args and 'cursor' not in request.args:
+        return None
+    limit = int(request.args.get('limit', DEFAULT_PAGE_SIZE))
+    if limit < 1:
+        raise ValueError("limit must be positive")
+    return min(limit, MAX_PAGE_SIZE), request.args.get('cursor')
+
+def wants_ndjson():
+    """True when the client asked for newline-delimited JSON streaming"""
+    return (request.args.get('format') == 'ndjson'
+            or request.accept_mimetypes.best == 'application/x-ndjson')
+
+def ndjson_response(items):
+    """Stream dicts as newline-delimited JSON, one row at a time"""
+    def generate():
+        for item in items:
+            yield app.json.dumps(item) + '\n'
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
 @app.route('/api/service-numbers')
 def get_service_numbers():
-    """Get all service numbers from database"""
+    """
+    Get all service numbers from database. Pass limit/cursor for keyset
+    pagination or format=ndjson to stream every row.
+    """
     try:
-        service_numbers = ServiceNumber.query.all()
-        return jsonify([{
-            'service_number': sn.service_number,
-            'created_at': sn.created_at.isoformat(),
-            'last_scraped': sn.last_scraped.isoformat() if sn.last_scraped else None,
-            'bill_count': len(sn.bills)
-        } for sn in service_numbers])
+        if wants_ndjson():
+            return ndjson_response(iter_service_numbers())
+        
+        try:
+            page = page_args()
+            if page:
+                limit, cursor = page
+                items, next_cursor = service_number_page(limit, cursor)
+                return jsonify({'items': items, 'next_cursor': next_cursor})
+        except (ValueError, TypeError) as e:
+            return jsonify({'error': str(e)}), 400
+        
+        service_numbers = service_number_summaries()
+        return jsonify([service_number_to_dict(sn) for sn in service_numbers])
     except Exception as e:
         logger.error(f"Error fetching service numbers: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/bills/<service_number>')
 def get_bills_api(service_number):
-    """Get bills for a service number via API"""
+    """
+    Get bills for a service number via API. ?fields=date,amount,raw_data picks
+    the fields returned; limit/cursor paginate and format=ndjson streams.
+    """
     try:
-        service_entry = ServiceNumber.query.filter_by(service_number=service_number).first()
-        if not service_entry:
+        try:
+            fields = parse_fields(request.args.get('fields'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        if not service_number_exists(service_number):
             return jsonify({'error': 'Service number not found'}), 404
         
-        bills = BillHistory.query.filter_by(service_number_id=service_entry.id).order_by(BillHistory.bill_date.desc()).all()
-        return jsonify([bill.to_dict() for bill in bills])
+        if wants_ndjson():
+            return ndjson_response(iter_bills(service_number, fields))
+        
+        try:
+            page = page_args()
+            if page:
+                limit, cursor = page
+                items, next_cursor = bill_page(service_number, fields, limit, cursor)
+                return jsonify({'items': items, 'next_cursor': next_cursor})
+        except (ValueError, TypeError) as e:
+            return jsonify({'error': str(e)}), 400
+        
+        return jsonify(bills_for_service_number(service_number, fields))
     except Exception as e:
         logger.error(f"Error fetching bills: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/http-pool-stats')
+def get_http_pool_stats():
+    """Connection pool hit/miss statistics for the shared scraper session"""
+    try:
+        return jsonify(scraper.pool_stats())
+    except Exception as e:
+        logger.error(f"Error fetching pool stats: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/metrics')
+def metrics():
+    """Scraper metrics for this process in the Prometheus text format"""
+    return Response(metrics_registry.render(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/dashboard')
 def dashboard():
     """Admin dashboard showing database statistics"""
@@ -298,7 +904,7 @@ def dashboard():
         # Get statistics
         total_service_numbers = ServiceNumber.query.count()
         total_bills = BillHistory.query.count()
-        recent_scrapes = ScrapingLog.query.order_by(ScrapingLog.created_at.desc()).limit(10).all()
+        recent_scrapes = ScrapingLog.query.filter_by(website=None).order_by(ScrapingLog.created_at.desc()).limit(10).all()
         
         # Get service numbers with bill counts
         service_numbers = db.session.query(
@@ -0,0 +1,445 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import urlparse
+from crawl_frontier import CrawlFrontier
+from html_parser import parse_html, tag_contains, TABLE_TAGS, LANDING_PAGE_TAGS
+from http_cache import request_key, fingerprint
+from http_session import (
+    USER_AGENT, DEFAULT_TIMEOUT, DEFAULT_RETRIES, RETRY_STATUS_CODES, retry_backoff
+)
+from metrics import timed, site_run, record_request, record_error, record_cache
+from scraper import TGSPDCLScraper, TABLE_KEYWORD_PATTERN, parse_bill_table
+from site_plans import SitePlan
+
+logger = logging.getLogger(__name__)
+
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+
+# In-flight requests allowed to one upstream host, and service numbers
+# scraped at once
+DEFAULT_HOST_CONCURRENCY = 8
+DEFAULT_MAX_CONCURRENCY = 200
+
+# Longest Retry-After honoured before a retry, in seconds
+MAX_RETRY_AFTER = 120
+
+
+def retry_after(response):
+    """Seconds from a numeric Retry-After header on a 503, or None"""
+    value = response.headers.get('Retry-After', '')
+    if response.status_code != 503 or not value.isdigit():
+        return None
+    return min(float(value), MAX_RETRY_AFTER)
+
+
+class AsyncScrapeSession:
+    """
+    One httpx client plus the per-host semaphores, plan-building locks and
+    connection pool counters shared by every scrape on an event loop
+    """
+
+    def __init__(self, scraper):
+        self.scraper = scraper
+        connect_timeout, read_timeout = DEFAULT_TIMEOUT
+        self.client = httpx.AsyncClient(
+            headers={'User-Agent': USER_AGENT},
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            # httpx retries connection errors only; 5xx responses are
+            # retried in AsyncScrapeSession.request
+            transport=httpx.AsyncHTTPTransport(
+                retries=DEFAULT_RETRIES,
+                limits=httpx.Limits(max_connections=scraper.max_concurrency,
+                                    max_keepalive_connections=scraper.host_concurrency * 4)
+            ),
+            follow_redirects=True
+        )
+        self.hosts = defaultdict(lambda: asyncio.Semaphore(scraper.host_concurrency))
+        self.plan_locks = defaultdict(asyncio.Lock)
+        self.numbers = asyncio.Semaphore(scraper.max_concurrency)
+        self.pool_counts = defaultdict(lambda: {'requests': 0, 'misses': 0})
+
+    async def request(self, method, url, **kwargs):
+        """
+        Send a request once the host's rate limit and concurrency limit allow
+        it, retrying 5xx responses with backoff like the requests session does
+        """
+        # The limiter may book the slot in a shared SQLite file, so keep that
+        # off the event loop
+        wait = await asyncio.to_thread(self.scraper.rate_limiter.reserve, url)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+        for retry_number in range(1, DEFAULT_RETRIES + 2):
+            response = await self._send(method, url, wait, **kwargs)
+            if response.status_code not in RETRY_STATUS_CODES or retry_number > DEFAULT_RETRIES:
+                return response
+
+            delay = retry_after(response) or retry_backoff(retry_number)
+            logger.warning(f"Retrying {method} {url} after HTTP {response.status_code} in {delay:.1f}s")
+            await asyncio.sleep(delay)
+            wait = 0.0
+
+    async def _send(self, method, url, wait, **kwargs):
+        async with self.hosts[urlparse(url).hostname]:
+            connected = []
+
+            async def trace(event_name, info):
+                if event_name == 'connection.connect_tcp.complete':
+                    connected.append(event_name)
+
+            start = time.perf_counter()
+            try:
+                response = await self.client.request(method, url, extensions={'trace': trace}, **kwargs)
+            except Exception as e:
+                record_request(method, url, type(e).__name__, 0, wait, time.perf_counter() - start)
+                raise
+            finally:
+                self._count_request(url, len(connected))
+            record_request(method, url, response.status_code, len(response.content), wait,
+                           time.perf_counter() - start)
+            return response
+
+    def _count_request(self, url, connections_opened):
+        parts = urlparse(url)
+        counts = self.pool_counts[(parts.scheme, parts.hostname, parts.port)]
+        counts['requests'] += 1
+        counts['misses'] += connections_opened
+
+    def pool_stats(self):
+        """Per-host keep-alive statistics, shaped like http_session.get_pool_stats"""
+        return [
+            {
+                'scheme': scheme,
+                'host': host,
+                'port': port,
+                'requests': counts['requests'],
+                'hits': max(0, counts['requests'] - counts['misses']),
+                'misses': counts['misses'],
+            }
+            for (scheme, host, port), counts in list(self.pool_counts.items())
+        ]
+
+    async def aclose(self):
+        await self.client.aclose()
+
+
+class AsyncTGSPDCLScraper(TGSPDCLScraper):
+    """
+    asyncio version of TGSPDCLScraper on httpx.
+
+    The crawl follows the same steps and reuses the same plan, page cache,
+    crawl frontier and parsing code, so bills come back in the same shape.
+    Scrapes run on one long-lived event loop thread with one client, so
+    every caller shares keep-alive connections, landing page plans and the
+    limits of at most host_concurrency requests in flight to each host and
+    max_concurrency service numbers at once. get_bill_history and
+    scrape_many are synchronous wrappers for Flask routes, the CLI and the
+    job queue's worker threads.
+    """
+
+    def __init__(self, host_concurrency=DEFAULT_HOST_CONCURRENCY,
+                 max_concurrency=DEFAULT_MAX_CONCURRENCY, **kwargs):
+        if not HTTPX_AVAILABLE:
+            raise ImportError("AsyncTGSPDCLScraper requires httpx to be installed")
+        super().__init__(**kwargs)
+        self.host_concurrency = host_concurrency
+        self.max_concurrency = max_concurrency
+        self._loop = None
+        self._loop_pid = None
+        self._scrape_session = None
+        self._loop_lock = threading.Lock()
+
+    def get_bill_history(self, service_number, site_runs=None):
+        """Scrape one service number, blocking until it is done"""
+        return self._run_on_loop(self.get_bill_history_async, service_number, site_runs)
+
+    def scrape_many(self, service_numbers):
+        """Scrape many service numbers concurrently, returning {service number: bills}"""
+        return self._run_on_loop(self.scrape_many_async, service_numbers)
+
+    def pool_stats(self):
+        if self._scrape_session is None:
+            return []
+        return self._scrape_session.pool_stats()
+
+    def close(self):
+        """Close the shared client and stop the event loop thread"""
+        with self._loop_lock:
+            loop, session = self._loop, self._scrape_session
+            self._loop = self._scrape_session = None
+        if loop is not None and self._loop_pid == os.getpid():
+            asyncio.run_coroutine_threadsafe(session.aclose(), loop).result()
+            loop.call_soon_threadsafe(loop.stop)
+
+    def _run_on_loop(self, coroutine_function, *args):
+        """Run coroutine_function(session, *args) on the scraper's event loop and wait for it"""
+        loop, session = self._get_loop()
+        return asyncio.run_coroutine_threadsafe(coroutine_function(session, *args), loop).result()
+
+    def _get_loop(self):
+        # Started lazily, and again after a fork, so the loop thread lives in
+        # the process that scrapes (gunicorn forks workers after importing
+        # the app)
+        with self._loop_lock:
+            if self._loop is None or self._loop_pid != os.getpid():
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name='async-scraper', daemon=True).start()
+
+                async def open_session():
+                    return AsyncScrapeSession(self)
+
+                self._scrape_session = asyncio.run_coroutine_threadsafe(open_session(), loop).result()
+                self._loop = loop
+                self._loop_pid = os.getpid()
+            return self._loop, self._scrape_session
+
+    async def scrape_many_async(self, session, service_numbers):
+        numbers = list(dict.fromkeys(service_numbers))
+        results = await asyncio.gather(*[
+            self.get_bill_history_async(session, service_number) for service_number in numbers
+        ])
+        return dict(zip(numbers, results))
+
+    async def get_bill_history_async(self, session, service_number, site_runs=None):
+        """Async counterpart of TGSPDCLScraper.get_bill_history"""
+        site_runs = [] if site_runs is None else site_runs
+        frontier = CrawlFrontier(budget=self.crawl_budget, max_depth=self.crawl_depth, sites=self.websites)
+
+        async with session.numbers:
+            site_results = await asyncio.gather(*[
+                self._scrape_site_async(session, website, service_number, frontier, site_runs)
+                for website in self.websites
+            ])
+
+        all_bills = []
+        for bills in site_results:
+            all_bills.extend(bills)
+
+        return self._filter_last_20_months(self._remove_duplicates(all_bills))
+
+    async def _scrape_site_async(self, session, url, service_number, frontier, site_runs):
+        site_frontier = frontier.site(url)
+        with site_run(url) as run:
+            try:
+                bills = await self._scrape_website_async(session, url, service_number, site_frontier)
+            finally:
+                site_frontier.release()
+            run.bills_found = len(bills)
+        site_runs.append(run)
+        return bills
+
+    async def _scrape_website_async(self, session, url, service_number, frontier):
+        try:
+            logger.info(f"Scraping {url} for service number {service_number}")
+            if not frontier.visit(url):
+                return []
+
+            if 'tgsouthernpower.org' in url:
+                return await self._scrape_tgsouthernpower_async(session, url, service_number, frontier)
+            elif 'billdesk.com' in url:
+                return await self._scrape_billdesk_async(session, url, service_number, frontier)
+            elif 'webportal.tgsouthernpower.org' in url:
+                return await self._scrape_webportal_async(session, url, service_number, frontier)
+            else:
+                return await self._generic_scrape_async(session, url, service_number)
+
+        except Exception as e:
+            logger.error(f"Error scraping {url}: {str(e)}")
+            record_error(e)
+            return []
+
+    async def _fetch_extracted_async(self, session, method, url, extract, scope=None, **kwargs):
+        """Async counterpart of TGSPDCLScraper._fetch_extracted"""
+        if self.page_cache is None:
+            response = await session.request(method, url, **kwargs)
+            response.raise_for_status()
+            return await self._run_extract(extract, response.content)
+
+        key = request_key(method, url, kwargs.get('params'), kwargs.get('data'), scope)
+        entry = await self._page_cache_call_async('get', key)
+
+        headers = {}
+        if entry and method == 'GET':
+            if entry['etag']:
+                headers['If-None-Match'] = entry['etag']
+            if entry['last_modified']:
+                headers['If-Modified-Since'] = entry['last_modified']
+
+        response = await session.request(method, url, headers=headers, **kwargs)
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+
+        if response.status_code == 304 and entry:
+            record_cache('page', 'not_modified')
+            await self._page_cache_call_async('touch', key, etag, last_modified)
+            return entry['extracted']
+
+        response.raise_for_status()
+        content_hash = fingerprint(response.content)
+
+        if entry and entry['fingerprint'] == content_hash:
+            record_cache('page', 'unchanged')
+            await self._page_cache_call_async('touch', key, etag, last_modified)
+            return entry['extracted']
+
+        record_cache('page', 'miss')
+        extracted = await self._run_extract(extract, response.content)
+        await self._page_cache_call_async('put', key, etag, last_modified, content_hash, extracted)
+        return extracted
+
+    async def _page_cache_call_async(self, method, *args):
+        """_page_cache_call in a worker thread, since the page cache is a SQLite file"""
+        return await asyncio.to_thread(self._page_cache_call, method, *args)
+
+    async def _run_extract(self, extract, content):
+        """
+        Run an extraction in a worker thread so the loop keeps fetching while
+        pages are parsed, inline in that thread or handed to the parse pool
+        """
+        return await asyncio.to_thread(extract, content)
+
+    async def _get_site_plan_async(self, session, url):
+        """Cached plan for url, built by one coroutine while the others wait"""
+        plan = self.site_plans.get(url)
+        if plan is not None:
+            record_cache('site_plan', 'hit')
+            return plan
+
+        async with session.plan_locks[url]:
+            plan = self.site_plans.get(url)
+            record_cache('site_plan', 'miss' if plan is None else 'hit')
+            if plan is None:
+                def extract(content):
+                    with timed('parse'):
+                        soup = parse_html(content, LANDING_PAGE_TAGS, self.parser_backend)
+                    with timed('plan'):
+                        return SitePlan.from_soup(soup, url).to_dict()
+
+                plan = SitePlan.from_dict(await self._fetch_extracted_async(session, 'GET', url, extract))
+                self.site_plans.put(url, plan)
+            return plan
+
+    async def _scrape_tgsouthernpower_async(self, session, url, service_number, frontier):
+        bills = []
+
+        try:
+            plan = await self._get_site_plan_async(session, url)
+
+            for form in plan.forms:
+                if form.input_keywords and frontier.claim_form(form.method, form.action_url):
+                    bills.extend(await self._submit_form_and_parse_async(session, form, service_number))
+
+            for link_url in plan.links:
+                frontier.add(link_url, 1)
+
+            while True:
+                link = frontier.pop()
+                if link is None:
+                    break
+                link_url, depth = link
+                bills.extend(await self._follow_link_and_search_async(
+                    session, link_url, service_number, frontier, depth
+                ))
+
+        except Exception as e:
+            logger.error(f"Error scraping tgsouthernpower: {str(e)}")
+            record_error(e)
+
+        return bills
+
+    async def _scrape_billdesk_async(self, session, url, service_number, frontier):
+        bills = []
+
+        try:
+            plan = await self._get_site_plan_async(session, url)
+
+            for form in plan.forms:
+                if form.input_keywords & {'service', 'consumer', 'account'} and \
+                        frontier.claim_form('POST', form.action_url):
+                    bills.extend(await self._fetch_extracted_async(
+                        session, 'POST', form.action_url, self._bill_extractor(service_number),
+                        data={'consumerNumber': service_number}
+                    ))
+
+        except Exception as e:
+            logger.error(f"Error scraping billdesk: {str(e)}")
+            record_error(e)
+
+        return bills
+
+    async def _scrape_webportal_async(self, session, url, service_number, frontier):
+        bills = []
+
+        try:
+            plan = await self._get_site_plan_async(session, url)
+
+            for form in plan.forms:
+                if form.mentions_billing and frontier.claim_form(form.method, form.action_url):
+                    bills.extend(await self._submit_form_and_parse_async(session, form, service_number))
+
+        except Exception as e:
+            logger.error(f"Error scraping webportal: {str(e)}")
+            record_error(e)
+
+        return bills
+
+    async def _generic_scrape_async(self, session, url, service_number):
+        def extract(content):
+            with timed('parse'):
+                soup = parse_html(content, TABLE_TAGS, self.parser_backend)
+            with timed('classify'):
+                table_bills = []
+                for table in soup.find_all('table'):
+                    if tag_contains(table, TABLE_KEYWORD_PATTERN):
+                        table_bills.extend(parse_bill_table(table, service_number))
+                return table_bills
+
+        try:
+            return await self._fetch_extracted_async(session, 'GET', url, extract, scope=service_number)
+        except Exception as e:
+            logger.error(f"Error in generic scrape: {str(e)}")
+            record_error(e)
+            return []
+
+    async def _submit_form_and_parse_async(self, session, form, service_number):
+        try:
+            if not form.action_url:
+                return []
+
+            form_data = form.build_data(service_number)
+            extract = self._bill_extractor(service_number)
+            if form.method == 'POST':
+                return await self._fetch_extracted_async(session, 'POST', form.action_url, extract, data=form_data)
+            return await self._fetch_extracted_async(session, 'GET', form.action_url, extract, params=form_data)
+
+        except Exception as e:
+            logger.error(f"Error submitting form: {str(e)}")
+            record_error(e)
+            return []
+
+    async def _follow_link_and_search_async(self, session, url, service_number, frontier, depth):
+        bills = []
+
+        try:
+            plan = await self._get_site_plan_async(session, url)
+
+            for form in plan.forms:
+                if frontier.claim_form(form.method, form.action_url):
+                    bills.extend(await self._submit_form_and_parse_async(session, form, service_number))
+
+            for link_url in plan.links:
+                frontier.add(link_url, depth + 1)
+
+        except Exception as e:
+            logger.error(f"Error following link {url}: {str(e)}")
+            record_error(e)
+
+        return bills
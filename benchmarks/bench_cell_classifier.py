@@ -0,0 +1,105 @@
+"""
+Micro-benchmark for table cell classification.
+
+    python benchmarks/bench_cell_classifier.py [--repeat N]
+
+Runs the old per-cell _is_date/_is_amount/_is_bill_number chain and the
+compiled classifier used by parse_bill_table over every table in the
+benchmark corpus (tables from pages saved in benchmarks/pages/, or
+generated bill and payment history tables when none are saved), and
+counts how many bills each path finds a date for.
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cell_classifier import classify_row, infer_column_roles  # noqa: E402
+from html_parser import parse_html  # noqa: E402
+from sample_pages import bill_table, payment_table, load_saved_pages  # noqa: E402
+
+
+def legacy_classify_row(cell_texts):
+    """The classification loop parse_bill_table used before the classifier module"""
+    bill_data = {}
+    for text in cell_texts:
+        if any(re.search(p, text) for p in [
+            r'\d{1,2}[/-]\d{1,2}[/-]\d{2,4}', r'\d{1,2}-\w{3}-\d{2,4}', r'\w{3}\s+\d{1,2},?\s+\d{4}'
+        ]):
+            bill_data['date'] = text
+        elif any(re.search(p, text) for p in [
+            r'₹\s*\d+(?:,\d+)*(?:\.\d{2})?', r'\d+(?:,\d+)*(?:\.\d{2})?\s*₹', r'Rs\.?\s*\d+(?:,\d+)*(?:\.\d{2})?'
+        ]) or (re.search(r'\d+(?:,\d+)*(?:\.\d{2})?', text) and len(text) <= 20):
+            bill_data['amount'] = text
+        elif re.search(r'[A-Z0-9]{6,}', text) is not None:
+            bill_data['bill_number'] = text
+        elif any(status in text.lower() for status in ['paid', 'unpaid', 'due']):
+            bill_data['status'] = text
+    return bill_data
+
+
+def compiled_classify_table(rows):
+    bills = []
+    roles = None
+    for cell_texts in rows:
+        if roles is None:
+            header_roles = infer_column_roles(cell_texts)
+            if header_roles:
+                roles = header_roles
+                continue
+        bill_data = classify_row(cell_texts, roles)
+        if 'date' in bill_data or 'amount' in bill_data:
+            roles = roles or {}
+            bills.append(bill_data)
+    return bills
+
+
+def legacy_classify_table(rows):
+    bills = []
+    for cell_texts in rows:
+        bill_data = legacy_classify_row(cell_texts)
+        if 'date' in bill_data or 'amount' in bill_data:
+            bills.append(bill_data)
+    return bills
+
+
+def load_corpus():
+    """Each table as a list of rows of stripped cell texts (rows of 3+ cells only)"""
+    pages = load_saved_pages()
+    if not pages:
+        pages = {f'generated_{seed}': bill_table(months=20, seed=seed).encode() for seed in range(200)}
+        pages.update({f'payments_{seed}': payment_table(seed=seed).encode() for seed in range(60)})
+    corpus = []
+    for content in pages.values():
+        for table in parse_html(content, ['table']).find_all('table'):
+            rows = [[cell.get_text(strip=True) for cell in row.find_all(['td', 'th'])] for row in table.find_all('tr')]
+            rows = [row for row in rows if len(row) >= 3]
+            if rows:
+                corpus.append(rows)
+    return corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+    cells = sum(len(row) for rows in corpus for row in rows)
+    print(f'{len(corpus)} tables, {cells} cells')
+
+    for label, classify_table in [('legacy per-cell', legacy_classify_table), ('compiled + header roles', compiled_classify_table)]:
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            bills = [bill for rows in corpus for bill in classify_table(rows)]
+        seconds = (time.perf_counter() - start) / args.repeat
+        dated = sum(1 for bill in bills if 'date' in bill)
+        print(f'  {label:<24} {seconds * 1000:8.2f} ms  {cells / seconds / 1e6:6.2f} M cells/s  '
+              f'{len(bills)} bills, {dated} dated')
+
+
+if __name__ == '__main__':
+    main()
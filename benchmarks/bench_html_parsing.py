@@ -0,0 +1,63 @@
+"""
+Compare HTML parsing strategies on utility pages.
+
+    python benchmarks/bench_html_parsing.py [--repeat N]
+
+Times a full html.parser tree (the old behaviour) against the strained
+parse used by the scraper, with lxml when it is installed, then times bill
+extraction from each tree and checks that every strategy finds the same
+bills.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup  # noqa: E402
+from html_parser import parse_html, LXML_AVAILABLE, RESULT_PAGE_TAGS  # noqa: E402
+from sample_pages import benchmark_pages  # noqa: E402
+from scraper import parse_bill_response  # noqa: E402
+
+
+def time_strategy(parse, content, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        soup = parse(content)
+    return (time.perf_counter() - start) / repeat, soup
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    strategies = [
+        ('html.parser full tree', lambda content: BeautifulSoup(content, 'html.parser')),
+        ('html.parser strained', lambda content: parse_html(content, RESULT_PAGE_TAGS, 'html.parser')),
+    ]
+    if LXML_AVAILABLE:
+        strategies.append(('lxml strained', lambda content: parse_html(content, RESULT_PAGE_TAGS, 'lxml')))
+    else:
+        print('lxml is not installed; skipping the lxml strategy')
+
+    for name, content in benchmark_pages().items():
+        print(f'\n{name} ({len(content) / 1024:.0f} KiB)')
+        baseline = None
+        expected = None
+        for label, parse in strategies:
+            seconds, soup = time_strategy(parse, content, args.repeat)
+            extract_seconds, bills = time_strategy(
+                lambda parsed: parse_bill_response(parsed, 'BENCH'), soup, args.repeat
+            )
+            baseline = baseline or seconds
+            print(f'  {label:<24} parse {seconds * 1000:8.2f} ms  {baseline / seconds:5.1f}x  '
+                  f'extract {extract_seconds * 1000:7.2f} ms  {len(bills)} bills')
+            if expected is None:
+                expected = bills
+            assert bills == expected, f'{label} found different bills than {strategies[0][0]}'
+
+
+if __name__ == '__main__':
+    main()
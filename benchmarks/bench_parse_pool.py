@@ -0,0 +1,58 @@
+"""
+Compare inline bill parsing with the process-pool parse workers.
+
+    python benchmarks/bench_parse_pool.py [--pages N] [--workers 1,2,4]
+
+Parses the same result pages inline and through pools of each size, the
+way fetch threads hand pages to TGSPDCLScraper's parse workers, and
+reports pages per second. Pools only help on machines with spare cores.
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sample_pages import benchmark_pages  # noqa: E402
+from scraper import TGSPDCLScraper, parse_bill_page  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--pages', type=int, default=200)
+    parser.add_argument('--workers', default=','.join(str(n) for n in sorted({1, 2, os.cpu_count() or 1})))
+    args = parser.parse_args()
+
+    samples = list(benchmark_pages().values())
+    pages = [samples[i % len(samples)] for i in range(args.pages)]
+    print(f'{len(pages)} pages on {os.cpu_count()} cores')
+
+    scraper = TGSPDCLScraper(concurrent=False)
+    start = time.perf_counter()
+    expected = [scraper._bill_extractor('BENCH')(content) for content in pages]
+    inline = time.perf_counter() - start
+    print(f'  {"inline":<12} {len(pages) / inline:8.1f} pages/s')
+
+    for workers in [int(n) for n in args.workers.split(',')]:
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(workers, mp_context=context) as pool:
+            # Warm the workers up so start-up time is not counted
+            list(pool.map(parse_bill_page, pages[:workers], ['BENCH'] * workers))
+
+            # Fetch threads submit pages and wait on the results
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max(4, workers * 2)) as fetchers:
+                results = list(fetchers.map(
+                    lambda content: pool.submit(parse_bill_page, content, 'BENCH').result(), pages
+                ))
+            seconds = time.perf_counter() - start
+
+        assert results == expected, 'pool results differ from inline parsing'
+        print(f'  {f"{workers} workers":<12} {len(pages) / seconds:8.1f} pages/s  {inline / seconds:5.1f}x')
+
+
+if __name__ == '__main__':
+    main()
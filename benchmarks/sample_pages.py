@@ -0,0 +1,105 @@
+"""
+Representative utility portal pages for the benchmarks.
+
+Pages saved from the live sites can be dropped into benchmarks/pages/ as
+.html files; when that directory is empty, synthetic pages shaped like the
+TGSPDCL portals (large navigation menus, deeply nested layout divs and a
+bill history table) are generated instead.
+"""
+import os
+import random
+
+PAGES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pages')
+
+
+def load_saved_pages():
+    """Return {filename: bytes} for every saved page in benchmarks/pages/"""
+    pages = {}
+    if os.path.isdir(PAGES_DIR):
+        for name in sorted(os.listdir(PAGES_DIR)):
+            if name.endswith(('.html', '.htm', '.jsp')):
+                with open(os.path.join(PAGES_DIR, name), 'rb') as f:
+                    pages[name] = f.read()
+    return pages
+
+
+def bill_table(months=20, seed=0):
+    """A bill history table with a header row and one row per month"""
+    rng = random.Random(seed)
+    rows = ['<tr><th>S.No</th><th>Bill Date</th><th>Bill No</th><th>Units</th><th>Amount</th><th>Status</th></tr>']
+    for month in range(months):
+        rows.append(
+            f'<tr><td>{month + 1}</td><td>{rng.randint(1, 28):02d}/{month % 12 + 1:02d}/{2025 + month // 12}</td>'
+            f'<td>TS{rng.randint(10 ** 9, 10 ** 10 - 1)}</td><td>{rng.randint(80, 600)}</td>'
+            f'<td>Rs. {rng.randint(300, 5000):,}.{rng.randint(0, 99):02d}</td>'
+            f'<td>{rng.choice(["Paid", "Paid", "Unpaid", "Due"])}</td></tr>'
+        )
+    return '<table class="table">' + ''.join(rows) + '</table>'
+
+
+# Payment history header layouts, whose date columns are named after the
+# transaction or receipt rather than the bill
+PAYMENT_HEADERS = [
+    ['Transaction ID', 'Transaction Date', 'Amount', 'Status'],
+    ['S.No', 'Txn Date', 'Amount'],
+    ['Receipt No', 'Receipt Date', 'Receipt Amount', 'Mode'],
+]
+
+
+def payment_table(payments=12, seed=0):
+    """A payment history table using one of the PAYMENT_HEADERS layouts"""
+    rng = random.Random(seed)
+    headers = PAYMENT_HEADERS[seed % len(PAYMENT_HEADERS)]
+    rows = ['<tr>' + ''.join(f'<th>{header}</th>' for header in headers) + '</tr>']
+    for payment in range(payments):
+        values = {
+            'Transaction ID': f'TXN{rng.randint(10 ** 9, 10 ** 10 - 1)}',
+            'Receipt No': f'RCPT{rng.randint(10 ** 7, 10 ** 8 - 1)}',
+            'S.No': str(payment + 1),
+            'Amount': f'{rng.randint(300, 5000)}.00',
+            'Receipt Amount': f'Rs. {rng.randint(300, 5000):,}.00',
+            'Status': rng.choice(['Success', 'Paid']),
+            'Mode': rng.choice(['UPI', 'Card', 'Cash']),
+        }
+        date = f'{rng.randint(1, 28):02d}/{payment % 12 + 1:02d}/{2025 + payment // 12}'
+        cells = [date if 'Date' in header else values[header] for header in headers]
+        rows.append('<tr>' + ''.join(f'<td>{cell}</td>' for cell in cells) + '</tr>')
+    return '<table class="table">' + ''.join(rows) + '</table>'
+
+
+def synthetic_page(menu_links=300, nesting=25, paragraphs=200, seed=0):
+    """A large result page: navigation menu, nested layout divs and a bill table"""
+    rng = random.Random(seed)
+    menu = ''.join(
+        f'<li><a href="/section/{i}/{rng.choice(["about", "tariff", "bill", "news", "payment"])}">Link {i}</a></li>'
+        for i in range(menu_links)
+    )
+    filler = ''.join(
+        f'<p class="text">Notice {i}: consumers may contact the customer service centre for assistance.</p>'
+        for i in range(paragraphs)
+    )
+    body = f'<div class="content">{filler}<div class="bill-details">{bill_table(seed=seed)}'
+    body += '<div class="summary">Amount due 15/09/2026 Rs. 1,245.00</div></div></div>'
+    for depth in range(nesting):
+        body = f'<div class="layout-{depth}">{body}</div>'
+    form = (
+        '<form action="/TGSPDCL/Billinginfo/Billinginfo.jsp" method="post">'
+        '<input type="hidden" name="csrf" value="abc123"><input type="text" name="ukscno">'
+        '<input type="submit" value="Get Billing Info"></form>'
+    )
+    return (
+        '<!DOCTYPE html><html><head><title>Billing Info</title>'
+        + ''.join(f'<script>var s{i} = {i};</script>' for i in range(20))
+        + f'</head><body><nav><ul>{menu}</ul></nav>{form}{body}<footer>TGSPDCL</footer></body></html>'
+    ).encode()
+
+
+def benchmark_pages():
+    """Saved pages when available, otherwise synthetic ones"""
+    pages = load_saved_pages()
+    if not pages:
+        pages = {
+            'synthetic_small.html': synthetic_page(menu_links=50, nesting=8, paragraphs=20, seed=1),
+            'synthetic_large.html': synthetic_page(seed=2),
+        }
+    return pages
@@ -0,0 +1,108 @@
+import re
+
+# Cell labels, matching the keys used in scraped bill dicts
+DATE = 'date'
+AMOUNT = 'amount'
+BILL_NUMBER = 'bill_number'
+STATUS = 'status'
+
+DIGIT_PATTERN = re.compile(r'\d')
+DATE_PATTERN = re.compile(
+    r'\d{1,2}[/-]\d{1,2}[/-]\d{2,4}'
+    r'|\d{1,2}-\w{3}-\d{2,4}'
+    r'|\w{3}\s+\d{1,2},?\s+\d{4}'
+)
+CURRENCY_PATTERN = re.compile(
+    r'₹\s*\d+(?:,\d+)*(?:\.\d{2})?'
+    r'|\d+(?:,\d+)*(?:\.\d{2})?\s*₹'
+    r'|Rs\.?\s*\d+(?:,\d+)*(?:\.\d{2})?'
+)
+BILL_NUMBER_PATTERN = re.compile(r'[A-Z0-9]{6,}')
+STATUS_PATTERN = re.compile(r'paid|unpaid|due', re.IGNORECASE)
+
+# Header text that names a column's role, checked in order so that
+# "Transaction Date", "Receipt Amount" and "Txn Status" take the role of
+# what they describe rather than being read as bill numbers
+HEADER_ROLE_PATTERNS = [
+    (DATE, re.compile(r'date|month|period', re.IGNORECASE)),
+    (AMOUNT, re.compile(r'amount|amt|₹|rupees|payable', re.IGNORECASE)),
+    (STATUS, re.compile(r'status', re.IGNORECASE)),
+    (BILL_NUMBER, re.compile(r'bill\s*(?:no|num|#)|receipt|reference|ref\.?\s*no|txn|transaction', re.IGNORECASE)),
+]
+
+# Values a cell must look like to be accepted for a header-assigned role,
+# so total and footer rows under the header are not read as bills
+ROLE_VALUE_PATTERNS = {
+    DATE: DATE_PATTERN,
+    AMOUNT: DIGIT_PATTERN,
+}
+
+
+def classify_cell(text):
+    """
+    Label a cell as date, amount, bill number or status, or None.
+
+    Labels are tried in that order; cells without a digit skip straight to
+    the bill number and status checks, and amount needs no regex at all for
+    short numeric cells.
+    """
+    if DIGIT_PATTERN.search(text):
+        if DATE_PATTERN.search(text):
+            return DATE
+        # Short numeric cells are taken as plain amounts
+        if len(text) <= 20 or CURRENCY_PATTERN.search(text):
+            return AMOUNT
+
+    if BILL_NUMBER_PATTERN.search(text):
+        return BILL_NUMBER
+
+    if STATUS_PATTERN.search(text):
+        return STATUS
+
+    return None
+
+
+def infer_column_roles(cell_texts):
+    """
+    Read a header row into {column index: role}. Returns an empty dict when
+    the row does not look like a header with a date column, so tables
+    without one keep per-cell classification and their dates are found.
+    """
+    roles = {}
+    for index, text in enumerate(cell_texts):
+        if not text or DIGIT_PATTERN.search(text):
+            continue
+        for role, pattern in HEADER_ROLE_PATTERNS:
+            if pattern.search(text):
+                if role not in roles.values():
+                    roles[index] = role
+                break
+
+    if DATE in roles.values():
+        return roles
+    return {}
+
+
+def classify_row(cell_texts, roles=None):
+    """
+    Extract {role: text} from a table row, using the column roles from the
+    header when known and per-cell classification otherwise
+    """
+    bill_data = {}
+
+    if roles:
+        for index, role in roles.items():
+            if index >= len(cell_texts):
+                continue
+            text = cell_texts[index]
+            value_pattern = ROLE_VALUE_PATTERNS.get(role)
+            if text and (value_pattern is None or value_pattern.search(text)):
+                bill_data[role] = text
+        return bill_data
+
+    for text in cell_texts:
+        label = classify_cell(text)
+        if label:
+            bill_data[label] = text
+
+    return bill_data
@@ -0,0 +1,158 @@
+import heapq
+import itertools
+import threading
+from urllib.parse import urlsplit, urlunsplit
+
+# Requests one service number may make across all sites, and how many links
+# deep to follow from a landing page
+DEFAULT_REQUEST_BUDGET = 12
+DEFAULT_MAX_DEPTH = 1
+
+# Requests held back for each site: its landing page and first form
+RESERVED_PER_SITE = 2
+
+# Weights of URL keywords when choosing which bill links to follow first
+LINK_KEYWORD_SCORES = {
+    'history': 3,
+    'bill': 2,
+    'payment': 1,
+}
+
+
+def normalize_url(url):
+    """URL with the fragment dropped and scheme and host lowercased, for dedup"""
+    parts = urlsplit(url)
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path or '/', parts.query, ''))
+
+
+def score_link(url):
+    """Higher for links more likely to lead to bill history"""
+    parts = urlsplit(url.lower())
+    target = parts.path + '?' + parts.query
+    return sum(score for keyword, score in LINK_KEYWORD_SCORES.items() if keyword in target)
+
+
+class CrawlFrontier:
+    """
+    Crawl state for scraping one service number: which pages and forms have
+    been visited and how many requests are left.
+
+    Pages and form submissions each cost one request from the budget and
+    are never repeated. Each configured site has requests held back for
+    its landing page and first form submission, so one site following
+    links cannot spend the budget before the others have been tried. Sites
+    crawl through their own SiteFrontier, with their own link queue.
+    Shared by the site threads of one scrape, so it is thread safe.
+    """
+
+    def __init__(self, budget=DEFAULT_REQUEST_BUDGET, max_depth=DEFAULT_MAX_DEPTH, sites=()):
+        self.budget = budget
+        self.max_depth = max_depth
+        self.requests = 0
+        self._seen = set()
+        sites = list(sites)
+        reserve = min(RESERVED_PER_SITE, budget // len(sites)) if sites else 0
+        self._reserved = {site: reserve for site in sites}
+        self._order = itertools.count()
+        self._lock = threading.Lock()
+
+    def site(self, website):
+        """The frontier one site crawls through"""
+        return SiteFrontier(self, website)
+
+    def _spend(self, key, site, reserved):
+        # Called with self._lock held. Reserved requests may use what is
+        # held back for the site; others only what no site is holding.
+        if key in self._seen:
+            return False
+        if reserved and self._reserved.get(site, 0) > 0:
+            self._reserved[site] -= 1
+        elif self._available() <= 0:
+            return False
+        self._seen.add(key)
+        self.requests += 1
+        return True
+
+    def _available(self):
+        # Called with self._lock held
+        return self.budget - self.requests - sum(self._reserved.values())
+
+    def _release(self, site):
+        with self._lock:
+            self._reserved[site] = 0
+
+    @property
+    def exhausted(self):
+        with self._lock:
+            return self._available() <= 0
+
+
+class SiteFrontier:
+    """
+    One site's view of a CrawlFrontier. The landing page and first form
+    submission use the site's held-back requests; later forms and links
+    share what is left of the budget. Links queued here are only followed
+    by this site, best score first, then shallowest, then in discovery
+    order.
+    """
+
+    def __init__(self, frontier, website):
+        self.frontier = frontier
+        self.website = website
+        self.forms_claimed = 0
+        self._queue = []
+
+    def visit(self, url):
+        """Claim a page fetch. False if already visited or out of budget."""
+        frontier = self.frontier
+        with frontier._lock:
+            return frontier._spend(('GET', normalize_url(url)), self.website, reserved=True)
+
+    def claim_form(self, method, action_url):
+        """Claim a form submission. False if already submitted or out of budget."""
+        if not action_url:
+            return False
+        frontier = self.frontier
+        with frontier._lock:
+            claimed = frontier._spend((f'FORM {method}', normalize_url(action_url)), self.website,
+                                      reserved=self.forms_claimed == 0)
+            if claimed:
+                self.forms_claimed += 1
+            return claimed
+
+    def add(self, url, depth):
+        """Queue a link found at depth - 1, unless too deep or already seen"""
+        frontier = self.frontier
+        if depth > frontier.max_depth:
+            return False
+        key = normalize_url(url)
+        with frontier._lock:
+            if ('GET', key) in frontier._seen:
+                return False
+            heapq.heappush(self._queue, (-score_link(url), depth, next(frontier._order), url))
+            return True
+
+    def pop(self):
+        """
+        Claim the best waiting link, returning (url, depth), or None when the
+        queue is empty or the budget is spent. Following links gives up what
+        is still held back for this site.
+        """
+        frontier = self.frontier
+        frontier._release(self.website)
+        with frontier._lock:
+            while self._queue:
+                _, depth, _, url = heapq.heappop(self._queue)
+                if frontier._spend(('GET', normalize_url(url)), self.website, reserved=False):
+                    return url, depth
+                if frontier._available() <= 0:
+                    break
+            return None
+
+    def release(self):
+        """Give up whatever is still held back for this site once it is done"""
+        self.frontier._release(self.website)
+
+    @property
+    def exhausted(self):
+        return self.frontier.exhausted
@@ -0,0 +1,57 @@
+import threading
+from datetime import datetime
+from functools import lru_cache
+
+# Every date format seen on the TGSPDCL sites. The formats do not overlap,
+# so trying them in any order gives the same result.
+DATE_FORMATS = [
+    '%d/%m/%Y',
+    '%d-%m-%Y',
+    '%d/%m/%y',
+    '%d-%m-%y',
+    '%Y-%m-%d',
+    '%d-%b-%Y',
+    '%d %b %Y',
+    '%b %d, %Y'
+]
+
+
+class DateParser:
+    """
+    Date string parser with an LRU cache of results and learned format
+    order: whichever format matched last is tried first next time, since a
+    page (and usually a whole site) uses one format throughout.
+    """
+
+    def __init__(self, formats=DATE_FORMATS, cache_size=4096):
+        self.formats = list(formats)
+        self._lock = threading.Lock()
+        self.parse = lru_cache(maxsize=cache_size)(self._parse)
+
+    def _parse(self, date_str):
+        date_str = date_str.strip()
+        formats = list(self.formats)
+
+        for fmt in formats:
+            try:
+                value = datetime.strptime(date_str, fmt).date()
+            except ValueError:
+                continue
+
+            if fmt != formats[0]:
+                with self._lock:
+                    self.formats.remove(fmt)
+                    self.formats.insert(0, fmt)
+            return value
+
+        return None
+
+
+_parser = DateParser()
+
+
+def parse_date(date_str):
+    """Parse a scraped date string to a date object, or None if it is not a known format"""
+    if not date_str:
+        return None
+    return _parser.parse(date_str)
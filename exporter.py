@@ -0,0 +1,185 @@
+import csv
+import io
+import logging
+import os
+import tempfile
+from models import db, ServiceNumber, BillHistory
+
+logger = logging.getLogger(__name__)
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# Spreadsheet header -> selected column
+EXPORT_COLUMNS = [
+    ('Service Number', ServiceNumber.service_number),
+    ('Bill Number', BillHistory.bill_number),
+    ('Bill Date', BillHistory.bill_date),
+    ('Amount', BillHistory.amount),
+    ('Status', BillHistory.status),
+    ('Source Website', BillHistory.source_website),
+    ('Scraped On', BillHistory.created_at),
+]
+EXPORT_HEADERS = [header for header, _ in EXPORT_COLUMNS]
+
+EXPORT_FORMATS = {
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'xlsx'),
+    'csv': ('text/csv', 'csv'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+}
+
+# Rows fetched per round trip from the server-side cursor, and rows per
+# Parquet row group
+BATCH_SIZE = 1000
+CHUNK_SIZE = 64 * 1024
+
+
+class ExportError(Exception):
+    """Raised for export requests that cannot be served"""
+
+
+def export_query(service_numbers=None, start=None, end=None):
+    """
+    Bills for the given service numbers (every account when None), optionally
+    limited to bill dates in [start, end], ordered by account then newest bill
+    """
+    query = (
+        db.select(*[column for _, column in EXPORT_COLUMNS])
+        .select_from(BillHistory)
+        .join(ServiceNumber, BillHistory.service_number_id == ServiceNumber.id)
+        .order_by(ServiceNumber.service_number, BillHistory.bill_date.desc().nulls_last(), BillHistory.id.desc())
+    )
+    if service_numbers:
+        query = query.where(ServiceNumber.service_number.in_(service_numbers))
+    if start:
+        query = query.where(BillHistory.bill_date >= start)
+    if end:
+        query = query.where(BillHistory.bill_date <= end)
+    return query
+
+
+def iter_export_rows(query):
+    """Yield rows from a server-side cursor, BATCH_SIZE at a time"""
+    result = db.session.execute(query.execution_options(yield_per=BATCH_SIZE))
+    for row in result:
+        yield tuple(row)
+
+
+def format_row(row):
+    """Render a row as spreadsheet text, matching the original Excel export"""
+    service_number, bill_number, bill_date, amount, status, source, created_at = row
+    return [
+        service_number,
+        bill_number or 'N/A',
+        bill_date.strftime('%Y-%m-%d') if bill_date else 'N/A',
+        amount or 'N/A',
+        status or 'N/A',
+        source or 'N/A',
+        created_at.strftime('%Y-%m-%d %H:%M:%S') if created_at else 'N/A',
+    ]
+
+
+def stream_csv(rows):
+    """Yield CSV text in chunks as rows are read"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_HEADERS)
+
+    for row in rows:
+        writer.writerow(format_row(row))
+        if buffer.tell() >= CHUNK_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    yield buffer.getvalue()
+
+
+def write_xlsx(rows, path, sheet_name='Bills'):
+    """Write rows with openpyxl's write-only mode, which keeps memory flat"""
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    # Excel limits sheet names to 31 characters
+    sheet = workbook.create_sheet(title=sheet_name[:31])
+    sheet.append(EXPORT_HEADERS)
+    for row in rows:
+        sheet.append(format_row(row))
+    workbook.save(path)
+
+
+def write_parquet(rows, path):
+    """Write rows as typed Parquet, one row group per BATCH_SIZE rows"""
+    if not PYARROW_AVAILABLE:
+        raise ExportError("Parquet export requires pyarrow to be installed")
+
+    schema = pa.schema([
+        ('service_number', pa.string()),
+        ('bill_number', pa.string()),
+        ('bill_date', pa.date32()),
+        ('amount', pa.string()),
+        ('status', pa.string()),
+        ('source_website', pa.string()),
+        ('scraped_on', pa.timestamp('s')),
+    ])
+
+    with pq.ParquetWriter(path, schema) as writer:
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= BATCH_SIZE:
+                writer.write_table(_parquet_table(batch, schema))
+                batch = []
+        if batch:
+            writer.write_table(_parquet_table(batch, schema))
+
+
+def _parquet_table(batch, schema):
+    columns = list(zip(*batch))
+    return pa.Table.from_arrays(
+        [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+        schema=schema
+    )
+
+
+def stream_file(path):
+    """Yield a file in chunks; the caller removes it with remove_file once sent"""
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+
+
+def remove_file(path):
+    """Delete a temporary export file, tolerating one that is already gone"""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def export_to_file(rows, export_format, sheet_name='Bills'):
+    """
+    Write rows to a temporary xlsx or parquet file and return its path. The
+    formats need a complete file, so rows are spooled to disk rather than
+    held in memory.
+    """
+    fd, path = tempfile.mkstemp(suffix=f'.{export_format}')
+    os.close(fd)
+    try:
+        if export_format == 'xlsx':
+            write_xlsx(rows, path, sheet_name)
+        elif export_format == 'parquet':
+            write_parquet(rows, path)
+        else:
+            raise ExportError(f"Unsupported export format: {export_format}")
+    except Exception:
+        os.remove(path)
+        raise
+    return path
@@ -0,0 +1,72 @@
+import logging
+import os
+import re
+from bs4 import BeautifulSoup, SoupStrainer, Tag
+
+logger = logging.getLogger(__name__)
+
+try:
+    import lxml  # noqa: F401
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+# lxml is several times faster than the pure-Python parser; fall back to
+# html.parser when it is not installed. SCRAPER_HTML_PARSER overrides both.
+DEFAULT_BACKEND = os.environ.get("SCRAPER_HTML_PARSER") or ('lxml' if LXML_AVAILABLE else 'html.parser')
+
+# Tags each kind of page is searched for. Matching tags keep their whole
+# subtree, so inputs stay inside their forms and rows inside their tables.
+LANDING_PAGE_TAGS = ['form', 'a']
+RESULT_PAGE_TAGS = ['table', 'div']
+TABLE_TAGS = ['table']
+
+
+def parse_html(content, only=None, backend=None):
+    """
+    Parse an HTML document, building only the subtrees rooted at the tags in
+    `only` (all tags when None) to save time and memory on large pages.
+    """
+    parse_only = SoupStrainer(only) if only else None
+    return BeautifulSoup(content, backend or DEFAULT_BACKEND, parse_only=parse_only)
+
+
+def keyword_pattern(keywords):
+    """Compile keywords into a single case-insensitive regex"""
+    return re.compile('|'.join(re.escape(keyword) for keyword in keywords), re.IGNORECASE)
+
+
+def tag_text(tag):
+    """The tag's own name, attribute names and attribute values as one string"""
+    parts = [tag.name]
+    for name, value in tag.attrs.items():
+        parts.append(name)
+        parts.append(' '.join(value) if isinstance(value, list) else str(value))
+    return ' '.join(parts)
+
+
+def tag_contains(tag, pattern):
+    """
+    True when the pattern occurs anywhere in the tag's subtree: in a tag
+    name, attribute or text node. Each node is looked at once and the walk
+    stops at the first match, instead of serialising the subtree with str().
+    """
+    if pattern.search(tag_text(tag)):
+        return True
+
+    for node in tag.descendants:
+        if isinstance(node, Tag):
+            if pattern.search(tag_text(node)):
+                return True
+        elif pattern.search(node):
+            return True
+
+    return False
+
+
+def outermost(tags):
+    """
+    Drop tags nested inside another tag of the same name. A nested tag's
+    subtree is part of its ancestor's, so the ancestor decides for both.
+    """
+    return [tag for tag in tags if tag.find_parent(tag.name) is None]
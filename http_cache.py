@@ -0,0 +1,133 @@
+import hashlib
+import itertools
+import json
+import logging
+import sqlite3
+import time
+from urllib.parse import urlencode
+
+logger = logging.getLogger(__name__)
+
+# Entries not revalidated for this long are ignored, then deleted
+DEFAULT_MAX_AGE = 30 * 24 * 60 * 60
+
+# Form results are keyed by service number, so the table is capped and
+# pruned every PRUNE_EVERY writes, dropping the least recently used entries
+DEFAULT_MAX_ENTRIES = 50000
+PRUNE_EVERY = 200
+
+
+def request_key(method, url, params=None, data=None, scope=None):
+    """
+    Cache key for a request: method, URL and its sorted query or form data,
+    plus a scope for extractions that depend on more than the request (such
+    as bills stamped with the service number they were scraped for)
+    """
+    key = f'{method.upper()} {url}'
+    for values in (params, data):
+        if values:
+            key += ' ' + urlencode(sorted(values.items()))
+    if scope:
+        key += f' [{scope}]'
+    return key
+
+
+def fingerprint(content):
+    """Content hash used to recognise a page that has not changed"""
+    return hashlib.sha256(content).hexdigest()
+
+
+class PageCache:
+    """
+    Validators, content fingerprint and extracted data for fetched pages,
+    kept in a SQLite file so they survive restarts and are shared by every
+    worker process.
+
+    The extracted value is whatever the scraper pulled out of the page
+    (a serialised SitePlan or a list of bills) and must be JSON-serialisable.
+    Expired entries and those beyond max_entries are deleted on open and
+    every PRUNE_EVERY writes, so the file does not grow without limit.
+    """
+
+    def __init__(self, path, max_age=DEFAULT_MAX_AGE, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.max_age = max_age
+        self.max_entries = max_entries
+        self._writes = itertools.count(1)
+        with self._connect() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS page_cache '
+                '(key TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, '
+                'fingerprint TEXT NOT NULL, extracted TEXT NOT NULL, updated REAL NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS ix_page_cache_updated ON page_cache (updated)')
+        self.prune()
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30, isolation_level=None)
+
+    def get(self, key):
+        """Return the stored entry for key as a dict, or None"""
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                'SELECT etag, last_modified, fingerprint, extracted FROM page_cache '
+                'WHERE key = ? AND updated > ?',
+                (key, time.time() - self.max_age)
+            ).fetchone()
+        finally:
+            conn.close()
+
+        if row is None:
+            return None
+        etag, last_modified, content_hash, extracted = row
+        return {
+            'etag': etag,
+            'last_modified': last_modified,
+            'fingerprint': content_hash,
+            'extracted': json.loads(extracted),
+        }
+
+    def put(self, key, etag, last_modified, content_hash, extracted):
+        conn = self._connect()
+        try:
+            conn.execute(
+                'INSERT OR REPLACE INTO page_cache '
+                '(key, etag, last_modified, fingerprint, extracted, updated) VALUES (?, ?, ?, ?, ?, ?)',
+                (key, etag, last_modified, content_hash, json.dumps(extracted), time.time())
+            )
+        finally:
+            conn.close()
+
+        if next(self._writes) % PRUNE_EVERY == 0:
+            self.prune()
+
+    def prune(self):
+        """Delete expired entries, then the least recently used beyond max_entries"""
+        conn = self._connect()
+        try:
+            expired = conn.execute(
+                'DELETE FROM page_cache WHERE updated <= ?', (time.time() - self.max_age,)
+            ).rowcount
+            evicted = conn.execute(
+                'DELETE FROM page_cache WHERE key IN '
+                '(SELECT key FROM page_cache ORDER BY updated DESC LIMIT -1 OFFSET ?)',
+                (self.max_entries,)
+            ).rowcount
+        finally:
+            conn.close()
+
+        if expired or evicted:
+            logger.debug(f"Pruned page cache: {expired} expired, {evicted} over the size limit")
+
+    def touch(self, key, etag=None, last_modified=None):
+        """Record that an entry was revalidated, keeping any validators not resent"""
+        conn = self._connect()
+        try:
+            conn.execute(
+                'UPDATE page_cache SET etag = COALESCE(?, etag), '
+                'last_modified = COALESCE(?, last_modified), updated = ? WHERE key = ?',
+                (etag, last_modified, time.time(), key)
+            )
+        finally:
+            conn.close()
@@ -0,0 +1,122 @@
+import logging
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+# (connect, read) timeouts in seconds applied to every request
+DEFAULT_TIMEOUT = (5, 20)
+
+# Connection pools are per host; keep enough idle keep-alive connections
+# for every scrape worker thread to have one to each upstream host
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_MAXSIZE = 32
+
+# Retries on 5xx and connection errors, with exponential backoff
+RETRY_STATUS_CODES = (500, 502, 503, 504)
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF_FACTOR = 0.5
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter that applies a default timeout, since requests has none"""
+
+    def __init__(self, *args, timeout=DEFAULT_TIMEOUT, **kwargs):
+        self.timeout = timeout
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.timeout
+        return super().send(request, **kwargs)
+
+
+def build_session(timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES, backoff_factor=DEFAULT_BACKOFF_FACTOR,
+                  pool_connections=DEFAULT_POOL_CONNECTIONS, pool_maxsize=DEFAULT_POOL_MAXSIZE):
+    """
+    Create a requests session with pooled keep-alive connections, enforced
+    connect/read timeouts and retry with backoff on 5xx and connection errors
+    """
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=retries,
+        status=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUS_CODES,
+        # Form submissions here are lookups, so POST is safe to retry
+        allowed_methods=frozenset(['GET', 'HEAD', 'POST']),
+        raise_on_status=False
+    )
+    adapter = TimeoutHTTPAdapter(
+        timeout=timeout,
+        max_retries=retry,
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize
+    )
+
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update({'User-Agent': USER_AGENT})
+    return session
+
+
+def retry_backoff(retry_number, backoff_factor=DEFAULT_BACKOFF_FACTOR):
+    """Seconds to sleep before the nth retry, matching urllib3's Retry: 0, then factor * 2 ** (n - 1)"""
+    if retry_number <= 1:
+        return 0.0
+    return backoff_factor * (2 ** (retry_number - 1))
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """Return the process-wide scraper session, creating it on first use"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = build_session()
+        return _session
+
+
+def get_pool_stats(session=None):
+    """
+    Connection pool statistics per host. A request that had to open a new
+    connection counts as a miss; one that reused a keep-alive connection is
+    a hit.
+    """
+    session = session or get_session()
+    stats = []
+    seen = set()
+
+    for adapter in session.adapters.values():
+        if id(adapter) in seen:
+            continue
+        seen.add(id(adapter))
+
+        pools = adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            misses = pool.num_connections
+            # The pool queue is padded with None placeholders for unopened slots
+            idle = [conn for conn in list(pool.pool.queue) if conn is not None] if pool.pool else []
+            stats.append({
+                'scheme': pool.scheme,
+                'host': pool.host,
+                'port': pool.port,
+                'requests': pool.num_requests,
+                'hits': max(0, pool.num_requests - misses),
+                'misses': misses,
+                'idle_connections': len(idle)
+            })
+
+    return stats
@@ -0,0 +1,62 @@
+import logging
+import queue
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class ScrapeJobQueue:
+    """
+    In-process job queue that runs scrape tasks on a pool of worker threads.
+
+    Each queued item is the id of a ScrapingLog row; the handler looks the row
+    up, does the work and records progress on it, so any process sharing the
+    database can report on a job.
+    """
+
+    def __init__(self, app, handler, workers=4):
+        self.app = app
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.queue = queue.Queue()
+        self._threads = []
+        self._lock = threading.Lock()
+
+    def submit(self, log_ids):
+        """Queue scrape tasks, starting the worker pool on first use"""
+        self._ensure_workers()
+        for log_id in log_ids:
+            self.queue.put(log_id)
+
+    def join(self):
+        """Block until every queued task has finished"""
+        self.queue.join()
+
+    def pending_count(self):
+        """Approximate number of tasks waiting for a worker"""
+        return self.queue.qsize()
+
+    def _ensure_workers(self):
+        # Threads are started lazily so they live in the process that serves
+        # requests (gunicorn forks workers after importing the app).
+        with self._lock:
+            self._threads = [t for t in self._threads if t.is_alive()]
+            while len(self._threads) < self.workers:
+                thread = threading.Thread(
+                    target=self._worker,
+                    name=f"scrape-worker-{len(self._threads) + 1}",
+                    daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def _worker(self):
+        while True:
+            log_id = self.queue.get()
+            try:
+                with self.app.app_context():
+                    self.handler(log_id)
+            except Exception as e:
+                logger.error(f"Error running scrape task {log_id}: {str(e)}")
+            finally:
+                self.queue.task_done()
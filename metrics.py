@@ -0,0 +1,219 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from urllib.parse import urlparse
+
+# Upper bounds in seconds for timing histograms
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _label_text(labels):
+    if not labels:
+        return ''
+    escaped = (
+        str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        for value in labels.values()
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in zip(labels, escaped)) + '}'
+
+
+class Counter:
+    """Monotonic counter with labels"""
+
+    type_name = 'counter'
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels[name]) for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for key, value in sorted(values.items()):
+            yield self.name, dict(zip(self.labels, key)), value
+
+
+class Histogram:
+    """Cumulative histogram with labels, for timings"""
+
+    type_name = 'histogram'
+
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels[name]) for name in self.labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # [per-bucket counts, sum, count]
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+            state[1] += value
+            state[2] += 1
+
+    def samples(self):
+        with self._lock:
+            values = {key: (list(counts), total, count) for key, (counts, total, count) in self._values.items()}
+        for key, (counts, total, count) in sorted(values.items()):
+            labels = dict(zip(self.labels, key))
+            for bound, bucket_count in zip(self.buckets, counts):
+                yield f'{self.name}_bucket', dict(labels, le=repr(bound)), bucket_count
+            yield f'{self.name}_bucket', dict(labels, le='+Inf'), count
+            yield f'{self.name}_sum', labels, total
+            yield f'{self.name}_count', labels, count
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        lines = [
+            f'# Metrics for process {os.getpid()} only; with several server workers each scrape',
+            '# sees one of them. Pages parsed in the parse pool are timed as stage "parse_pool",',
+            '# without separate "parse" and "classify" timings.',
+        ]
+        for metric in self.metrics:
+            lines.append(f'# HELP {metric.name} {metric.help_text}')
+            lines.append(f'# TYPE {metric.name} {metric.type_name}')
+            for name, labels, value in metric.samples():
+                lines.append(f'{name}{_label_text(labels)} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+STAGE_SECONDS = registry.register(Histogram(
+    'scraper_stage_seconds',
+    'Time spent in each scrape pipeline stage',
+    ['stage']
+))
+SITE_SECONDS = registry.register(Histogram(
+    'scraper_site_seconds',
+    'Time to scrape one service number from one website',
+    ['site']
+))
+REQUESTS = registry.register(Counter(
+    'scraper_requests_total',
+    'Upstream HTTP requests by host, method and status code',
+    ['host', 'method', 'status']
+))
+RESPONSE_BYTES = registry.register(Counter(
+    'scraper_response_bytes_total',
+    'Upstream response body bytes by host',
+    ['host']
+))
+CACHE_LOOKUPS = registry.register(Counter(
+    'scraper_cache_lookups_total',
+    'Cache lookups by cache and result',
+    ['cache', 'result']
+))
+ERRORS = registry.register(Counter(
+    'scraper_errors_total',
+    'Errors caught while scraping, by website and exception class',
+    ['site', 'error']
+))
+TASKS = registry.register(Counter(
+    'scrape_tasks_total',
+    'Finished scrape tasks by final status',
+    ['status']
+))
+
+
+@contextmanager
+def timed(stage):
+    """Record the time spent in the with block under a pipeline stage"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage=stage)
+
+
+class SiteRun:
+    """What happened while scraping one website for one service number"""
+
+    def __init__(self, website):
+        self.website = website
+        self.site = urlparse(website).hostname or website
+        self.requests = 0
+        self.bytes = 0
+        self.bills_found = 0
+        self.errors = []
+        self.duration = None
+
+    @property
+    def status(self):
+        if self.bills_found:
+            return 'success'
+        return 'error' if self.errors else 'no_data'
+
+
+_current_site = ContextVar('current_site', default=None)
+
+
+@contextmanager
+def site_run(website):
+    """
+    Track a website scrape; requests and errors recorded inside the block,
+    in this thread or asyncio task, are attributed to it
+    """
+    run = SiteRun(website)
+    token = _current_site.set(run)
+    start = time.perf_counter()
+    try:
+        yield run
+    finally:
+        run.duration = time.perf_counter() - start
+        _current_site.reset(token)
+        SITE_SECONDS.observe(run.duration, site=run.site)
+
+
+def record_request(method, url, status, content_length, wait, seconds):
+    """Record one upstream request: rate limit wait, request time, status and bytes"""
+    host = urlparse(url).hostname or ''
+    STAGE_SECONDS.observe(wait, stage='rate_limit_wait')
+    STAGE_SECONDS.observe(seconds, stage='request')
+    REQUESTS.inc(host=host, method=method, status=status)
+    RESPONSE_BYTES.inc(content_length, host=host)
+
+    run = _current_site.get()
+    if run is not None:
+        run.requests += 1
+        run.bytes += content_length
+
+
+def record_error(error):
+    """Count a caught exception against the website being scraped"""
+    run = _current_site.get()
+    ERRORS.inc(site=run.site if run else '', error=type(error).__name__)
+    if run is not None:
+        run.errors.append(f"{type(error).__name__}: {error}")
+
+
+def record_cache(cache, result, count=1):
+    if count:
+        CACHE_LOOKUPS.inc(count, cache=cache, result=result)
@@ -0,0 +1,79 @@
+import logging
+from sqlalchemy import inspect, text
+
+logger = logging.getLogger(__name__)
+
+
+def upgrade_schema(db):
+    """
+    Bring an existing database up to date with the models.
+
+    db.create_all() only creates missing tables, so columns and indexes added
+    to existing tables are applied here. Every step is idempotent and safe to
+    run on each startup.
+    """
+    inspector = inspect(db.engine)
+    _drop_nulls_first_bill_date_index(db)
+
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+
+        existing_columns = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing_columns:
+                continue
+            if column.primary_key or not column.nullable:
+                logger.warning(f"Cannot add required column {table.name}.{column.name} automatically")
+                continue
+
+            column_type = column.type.compile(dialect=db.engine.dialect)
+            logger.info(f"Adding column {table.name}.{column.name}")
+            with db.engine.begin() as conn:
+                conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+
+        for index in table.indexes:
+            index.create(db.engine, checkfirst=True)
+
+    _convert_raw_data_to_json(db, inspector)
+
+
+def _drop_nulls_first_bill_date_index(db):
+    """
+    ix_bill_history_service_number_bill_date was first created with a plain
+    bill_date DESC, which PostgreSQL sorts NULLS FIRST, so it could not serve
+    the NULLS LAST bill list ordering. Drop that version; the index loop in
+    upgrade_schema creates the new one.
+    """
+    if db.engine.dialect.name != 'postgresql':
+        return
+
+    with db.engine.begin() as conn:
+        indexdef = conn.execute(
+            text("SELECT indexdef FROM pg_indexes WHERE indexname = 'ix_bill_history_service_number_bill_date'")
+        ).scalar()
+        if indexdef and 'NULLS LAST' not in indexdef:
+            logger.info("Rebuilding ix_bill_history_service_number_bill_date with NULLS LAST")
+            conn.execute(text('DROP INDEX ix_bill_history_service_number_bill_date'))
+
+
+def _convert_raw_data_to_json(db, inspector):
+    """
+    bill_history.raw_data used to be a Text column holding json.dumps output.
+    On PostgreSQL it becomes JSONB, converting existing rows in place. SQLite
+    stores the JSON type as text, so existing rows are already readable.
+    """
+    if db.engine.dialect.name != 'postgresql' or not inspector.has_table('bill_history'):
+        return
+
+    columns = {column['name']: column for column in inspector.get_columns('bill_history')}
+    raw_data = columns.get('raw_data')
+    if raw_data is None or raw_data['type'].__class__.__name__ == 'JSONB':
+        return
+
+    logger.info("Converting bill_history.raw_data to JSONB")
+    with db.engine.begin() as conn:
+        conn.execute(text(
+            "ALTER TABLE bill_history ALTER COLUMN raw_data TYPE JSONB "
+            "USING NULLIF(raw_data, '')::jsonb"
+        ))
@@ -1,7 +1,7 @@
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.dialects.postgresql import JSONB
 from datetime import datetime
-import json
 
 class Base(DeclarativeBase):
     pass
@@ -15,6 +15,7 @@ class ServiceNumber(db.Model):
     service_number = db.Column(db.String(20), unique=True, nullable=False, index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     last_scraped = db.Column(db.DateTime)
+    last_scheduled = db.Column(db.DateTime)  # Last queued by the refresh scheduler
     
     # Relationship to bills
     bills = db.relationship('BillHistory', backref='service_account', lazy=True, cascade='all, delete-orphan')
@@ -36,16 +37,30 @@ class BillHistory(db.Model):
     
     # Metadata
     source_website = db.Column(db.String(200))
-    raw_data = db.Column(db.Text)  # JSON string of original scraped data
+    raw_data = db.Column(db.JSON().with_variant(JSONB(), 'postgresql'))  # Original scraped data
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
-    # Unique constraint to prevent duplicate bills
+    # Unique constraint to prevent duplicate bills, plus composite indexes
+    # for the bill list ordering and the recent-scrape freshness check.
+    # Bill lists sort bill_date DESC NULLS LAST; PostgreSQL needs that in the
+    # index, while SQLite cannot declare it but already puts NULLs last in
+    # a DESC index.
     __table_args__ = (
         db.UniqueConstraint('service_number_id', 'bill_date', 'amount', name='unique_bill'),
+        db.Index(
+            'ix_bill_history_service_number_bill_date', service_number_id, bill_date.desc().nulls_last(), id.desc()
+        ).ddl_if(dialect='postgresql'),
+        db.Index(
+            'ix_bill_history_service_number_bill_date', service_number_id, bill_date.desc(), id.desc()
+        ).ddl_if(callable_=lambda ddl, target, bind, dialect, **kw: dialect.name != 'postgresql'),
+        db.Index('ix_bill_history_service_number_created_at', service_number_id, created_at),
     )
     
     def to_dict(self):
-        """Convert bill to dictionary for JSON serialization"""
+        """
+        Convert bill to dictionary for JSON serialization. Reads the related
+        ServiceNumber; list endpoints use queries.bill_row_to_dict instead.
+        """
         return {
             'id': self.id,
             'service_number': self.service_account.service_number,
@@ -54,7 +69,7 @@ class BillHistory(db.Model):
             'amount': self.amount,
             'status': self.status,
             'source': self.source_website,
-            'raw_data': json.loads(self.raw_data) if self.raw_data else None
+            'raw_data': self.raw_data
         }
     
     def __repr__(self):
@@ -65,12 +80,32 @@ class ScrapingLog(db.Model):
     
     id = db.Column(db.Integer, primary_key=True)
     service_number = db.Column(db.String(20), nullable=False)
+    service_number_id = db.Column(db.Integer, db.ForeignKey('service_numbers.id'))  # Resolved when queued
+    job_id = db.Column(db.String(32), index=True)  # Set for rows queued by /scrape
     website = db.Column(db.String(200))
-    status = db.Column(db.String(20))  # success, error, timeout
+    status = db.Column(db.String(20))  # queued, running, success, cached, no_data, error
     error_message = db.Column(db.Text)
     bills_found = db.Column(db.Integer, default=0)
     scraping_duration = db.Column(db.Float)  # seconds
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)  # When a worker claimed the queued task
+    
+    # The dashboard lists recent logs; per-number history filters then sorts
+    __table_args__ = (
+        db.Index('ix_scraping_logs_created_at', created_at),
+        db.Index('ix_scraping_logs_service_number_created_at', service_number, created_at),
+    )
+    
+    def __repr__(self):
+        return f'<ScrapingLog {self.service_number} - {self.status}>'
+
+class ScrapeLease(db.Model):
+    """Held while a process scrapes a service number, so others wait instead of duplicating it"""
+    __tablename__ = 'scrape_leases'
+    
+    key = db.Column(db.String(64), primary_key=True)  # Service number
+    owner = db.Column(db.String(32), nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
     
     def __repr__(self):
-        return f'<ScrapingLog {self.service_number} - {self.status}>'
\ No newline at end of file
+        return f'<ScrapeLease {self.key} - {self.owner}>'
@@ -0,0 +1,212 @@
+import base64
+import json
+from datetime import date
+from models import db, ServiceNumber, BillHistory
+
+# API field name -> column, for bills read in one joined query so
+# serialising a bill never lazy-loads its ServiceNumber
+BILL_FIELDS = {
+    'id': BillHistory.id,
+    'service_number': ServiceNumber.service_number,
+    'bill_number': BillHistory.bill_number,
+    'date': BillHistory.bill_date,
+    'amount': BillHistory.amount,
+    'status': BillHistory.status,
+    'source': BillHistory.source_website,
+    'raw_data': BillHistory.raw_data,
+    'created_at': BillHistory.created_at,
+}
+
+# List endpoints leave out raw_data unless it is asked for with fields=
+DEFAULT_BILL_FIELDS = ('id', 'service_number', 'bill_number', 'date', 'amount', 'status', 'source')
+
+# Page sizes for cursor pagination and batch size for streamed responses
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+STREAM_BATCH_SIZE = 500
+
+
+def parse_fields(fields_param):
+    """
+    Parse a comma-separated fields= parameter into bill field names.
+    Raises ValueError for unknown fields.
+    """
+    if not fields_param:
+        return list(DEFAULT_BILL_FIELDS)
+
+    fields = [field.strip() for field in fields_param.split(',') if field.strip()]
+    unknown = [field for field in fields if field not in BILL_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}. Available: {', '.join(BILL_FIELDS)}")
+    return fields
+
+
+def bill_query(service_numbers, fields=DEFAULT_BILL_FIELDS):
+    """
+    Select the requested bill fields for the given service numbers, newest
+    bill first. Rows always carry service_number plus the (_bill_date, _id)
+    sort key used for cursors.
+    """
+    columns = [BILL_FIELDS[field].label(field) for field in fields]
+    # The service number is always read so rows can be grouped by it
+    if 'service_number' not in fields:
+        columns.append(ServiceNumber.service_number.label('service_number'))
+    columns.append(BillHistory.bill_date.label('_bill_date'))
+    columns.append(BillHistory.id.label('_id'))
+
+    query = (
+        db.select(*columns)
+        .select_from(BillHistory)
+        .join(ServiceNumber, BillHistory.service_number_id == ServiceNumber.id)
+        .order_by(BillHistory.bill_date.desc().nulls_last(), BillHistory.id.desc())
+    )
+    if len(service_numbers) == 1:
+        # Compare service_number_id with a value the planner knows up front,
+        # so the bill date index returns rows already in order
+        return query.where(BillHistory.service_number_id == (
+            db.select(ServiceNumber.id)
+            .where(ServiceNumber.service_number == service_numbers[0])
+            .scalar_subquery()
+        ))
+    return query.where(ServiceNumber.service_number.in_(service_numbers))
+
+
+def bill_rows(service_numbers, fields=DEFAULT_BILL_FIELDS):
+    """All matching bill rows, newest bill first"""
+    return db.session.execute(bill_query(service_numbers, fields)).all()
+
+
+def bill_row_to_dict(row, fields=DEFAULT_BILL_FIELDS):
+    """Serialise a bill row with the requested fields, in the shape of BillHistory.to_dict"""
+    bill = {}
+    for field in fields:
+        value = getattr(row, field)
+        if field in ('date', 'created_at') and value:
+            value = value.isoformat()
+        bill[field] = value
+    return bill
+
+
+def bills_for_service_number(service_number, fields=DEFAULT_BILL_FIELDS):
+    """All bills for one service number as dicts, in a single query"""
+    return [bill_row_to_dict(row, fields) for row in bill_rows([service_number], fields)]
+
+
+def bills_by_service_number(service_numbers, fields=DEFAULT_BILL_FIELDS):
+    """{service number: [bill dicts]} for many service numbers, in a single query"""
+    results = {service_number: [] for service_number in service_numbers}
+    if service_numbers:
+        for row in bill_rows(list(service_numbers), fields):
+            results[row.service_number].append(bill_row_to_dict(row, fields))
+    return results
+
+
+def service_number_exists(service_number):
+    return db.session.execute(
+        db.select(ServiceNumber.id).where(ServiceNumber.service_number == service_number)
+    ).first() is not None
+
+
+def service_number_query():
+    """Service numbers with their bill counts computed in SQL, in id order"""
+    return (
+        db.select(
+            ServiceNumber.id,
+            ServiceNumber.service_number,
+            ServiceNumber.created_at,
+            ServiceNumber.last_scraped,
+            db.func.count(BillHistory.id).label('bill_count')
+        )
+        .outerjoin(BillHistory, BillHistory.service_number_id == ServiceNumber.id)
+        .group_by(ServiceNumber.id)
+        .order_by(ServiceNumber.id)
+    )
+
+
+def service_number_summaries():
+    """Every service number with its bill count"""
+    return db.session.execute(service_number_query()).all()
+
+
+def service_number_to_dict(row):
+    return {
+        'service_number': row.service_number,
+        'created_at': row.created_at.isoformat(),
+        'last_scraped': row.last_scraped.isoformat() if row.last_scraped else None,
+        'bill_count': row.bill_count
+    }
+
+
+def encode_cursor(values):
+    """Opaque, URL-safe cursor token for a row's sort key"""
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Decode a cursor token. Raises ValueError if it is malformed."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        return json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def bill_page(service_number, fields=DEFAULT_BILL_FIELDS, limit=DEFAULT_PAGE_SIZE, cursor=None):
+    """
+    One page of bills for a service number using keyset pagination on
+    (bill_date DESC NULLS LAST, id DESC). Returns (bill dicts, next cursor).
+    """
+    query = bill_query([service_number], fields)
+
+    if cursor:
+        cursor_date, cursor_id = decode_cursor(cursor)
+        if cursor_date is None:
+            query = query.where(BillHistory.bill_date.is_(None), BillHistory.id < cursor_id)
+        else:
+            cursor_date = date.fromisoformat(cursor_date)
+            query = query.where(db.or_(
+                BillHistory.bill_date < cursor_date,
+                db.and_(BillHistory.bill_date == cursor_date, BillHistory.id < cursor_id),
+                BillHistory.bill_date.is_(None)
+            ))
+
+    rows = db.session.execute(query.limit(limit + 1)).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor([last._bill_date.isoformat() if last._bill_date else None, last._id])
+
+    return [bill_row_to_dict(row, fields) for row in rows], next_cursor
+
+
+def service_number_page(limit=DEFAULT_PAGE_SIZE, cursor=None):
+    """One page of service number summaries keyed on id. Returns (dicts, next cursor)."""
+    query = service_number_query()
+    if cursor:
+        query = query.where(ServiceNumber.id > int(decode_cursor(cursor)))
+
+    rows = db.session.execute(query.limit(limit + 1)).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].id)
+
+    return [service_number_to_dict(row) for row in rows], next_cursor
+
+
+def iter_bills(service_number, fields=DEFAULT_BILL_FIELDS, batch_size=STREAM_BATCH_SIZE):
+    """
+    Yield every bill for a service number as a dict, fetching in batches
+    from a server-side cursor so memory stays flat however many rows match
+    """
+    result = db.session.execute(bill_query([service_number], fields).execution_options(yield_per=batch_size))
+    for row in result:
+        yield bill_row_to_dict(row, fields)
+
+
+def iter_service_numbers(batch_size=STREAM_BATCH_SIZE):
+    """Yield every service number summary, streamed from a server-side cursor"""
+    result = db.session.execute(service_number_query().execution_options(yield_per=batch_size))
+    for row in result:
+        yield service_number_to_dict(row)
@@ -0,0 +1,173 @@
+import logging
+import sqlite3
+import threading
+import time
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+# Requests per second and burst size for each upstream host. Subdomains share
+# the bucket of the closest configured parent domain.
+DEFAULT_RATE_LIMITS = {
+    'tgsouthernpower.org': (1.0, 2),
+    'webportal.tgsouthernpower.org': (1.0, 2),
+    'billdesk.com': (0.5, 1),
+}
+DEFAULT_RATE = (1.0, 1)
+
+
+def check_rate_limit(host, rate, burst):
+    """Raise ValueError unless rate is positive and burst is at least 1"""
+    if not rate > 0:
+        raise ValueError(f"Rate limit for {host} must be a positive number of requests per second, got {rate}")
+    if burst < 1:
+        raise ValueError(f"Burst for {host} must be at least 1, got {burst}")
+
+
+def parse_rate_limits(spec):
+    """
+    Parse a rate limit spec such as "tgsouthernpower.org=2:4,billdesk.com=0.5"
+    into {host: (rate, burst)}. Burst defaults to 1 when omitted. Raises
+    ValueError for a malformed entry, a rate <= 0 or a burst < 1.
+    """
+    limits = {}
+    for item in (spec or '').split(','):
+        item = item.strip()
+        if not item:
+            continue
+        host, _, value = item.partition('=')
+        host = host.strip().lower()
+        rate, _, burst = value.partition(':')
+        try:
+            rate, burst = float(rate), int(burst or 1)
+        except ValueError:
+            raise ValueError(f"Invalid rate limit {item!r}; expected host=rate[:burst]")
+        check_rate_limit(host, rate, burst)
+        limits[host] = (rate, burst)
+    return limits
+
+
+class MemoryBucketStore:
+    """Token buckets held in this process only"""
+
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def reserve(self, key, rate, burst):
+        """Take one token and return how long the caller must wait before using it"""
+        with self._lock:
+            now = time.monotonic()
+            tokens, updated = self._buckets.get(key, (burst, now))
+            tokens, wait = _take_token(tokens, updated, now, rate, burst)
+            self._buckets[key] = (tokens, now)
+            return wait
+
+
+class SQLiteBucketStore:
+    """
+    Token buckets kept in a SQLite file so several processes (e.g. gunicorn
+    workers) draw from the same budget for each host.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with self._connect() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS rate_limit_buckets '
+                '(key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)'
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30, isolation_level=None)
+
+    def reserve(self, key, rate, burst):
+        """Take one token and return how long the caller must wait before using it"""
+        conn = self._connect()
+        try:
+            # BEGIN IMMEDIATE serialises the read-modify-write across processes
+            conn.execute('BEGIN IMMEDIATE')
+            now = time.time()
+            row = conn.execute(
+                'SELECT tokens, updated FROM rate_limit_buckets WHERE key = ?', (key,)
+            ).fetchone()
+            tokens, updated = row if row else (burst, now)
+            tokens, wait = _take_token(tokens, updated, now, rate, burst)
+            conn.execute(
+                'INSERT OR REPLACE INTO rate_limit_buckets (key, tokens, updated) VALUES (?, ?, ?)',
+                (key, tokens, now)
+            )
+            conn.execute('COMMIT')
+            return wait
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+
+
+def _take_token(tokens, updated, now, rate, burst):
+    """
+    Refill a bucket and take one token from it. Tokens may go negative, which
+    reserves a future slot: the returned wait is the time until that slot.
+    """
+    tokens = min(burst, tokens + max(0.0, now - updated) * rate)
+    tokens -= 1
+    wait = -tokens / rate if tokens < 0 else 0.0
+    return tokens, wait
+
+
+class RateLimiter:
+    """
+    Per-host token bucket rate limiter.
+
+    Each call to acquire() blocks until the host's bucket allows one more
+    request, so scrapes run as fast as each host allows and no faster.
+    """
+
+    def __init__(self, limits=None, default=DEFAULT_RATE, store=None):
+        self.limits = dict(DEFAULT_RATE_LIMITS if limits is None else limits)
+        self.default = default
+        for host, (rate, burst) in self.limits.items():
+            check_rate_limit(host, rate, burst)
+        check_rate_limit('the default', *default)
+        self.store = store or MemoryBucketStore()
+
+    @classmethod
+    def from_config(cls, spec=None, db_path=None):
+        """Build a limiter from a rate limit spec and an optional shared SQLite file"""
+        limits = dict(DEFAULT_RATE_LIMITS)
+        limits.update(parse_rate_limits(spec))
+        store = SQLiteBucketStore(db_path) if db_path else None
+        return cls(limits=limits, store=store)
+
+    def bucket_for(self, host):
+        """Return (bucket key, rate, burst) for a host"""
+        host = (host or '').lower()
+        parts = host.split('.')
+        for i in range(len(parts)):
+            candidate = '.'.join(parts[i:])
+            if candidate in self.limits:
+                rate, burst = self.limits[candidate]
+                return candidate, rate, burst
+        rate, burst = self.default
+        return host, rate, burst
+
+    def reserve(self, url):
+        """Book one request to the url's host and return how long to wait before sending it"""
+        key, rate, burst = self.bucket_for(urlparse(url).hostname)
+        try:
+            wait = self.store.reserve(key, rate, burst)
+        except Exception as e:
+            # Never let a broken shared store stop scraping; fall back to the
+            # slowest pace the bucket allows
+            logger.error(f"Rate limit store error for {key}: {str(e)}")
+            wait = 1.0 / rate
+        return wait
+
+    def acquire(self, url):
+        """Wait for permission to send one request to the url's host, returning seconds waited"""
+        wait = self.reserve(url)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
@@ -0,0 +1,163 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# How long a scraped result counts as fresh, and how long a worker trusts
+# its in-process copy before re-reading the shared tier
+DEFAULT_TTL = 6 * 60 * 60
+DEFAULT_MEMORY_TTL = 60
+DEFAULT_MAX_ENTRIES = 10000
+
+
+class SQLiteResultStore:
+    """
+    Cached results kept in a SQLite file so every process (e.g. gunicorn
+    workers) sees results scraped by the others.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with self._connect() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS result_cache '
+                '(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL NOT NULL)'
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30, isolation_level=None)
+
+    def get_many(self, keys):
+        """Return {key: (value, expires)} for the keys that have not expired"""
+        found = {}
+        keys = list(keys)
+        conn = self._connect()
+        try:
+            now = time.time()
+            # Stay under SQLite's bound parameter limit
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                placeholders = ','.join('?' * len(chunk))
+                rows = conn.execute(
+                    f'SELECT key, value, expires FROM result_cache WHERE key IN ({placeholders}) AND expires > ?',
+                    (*chunk, now)
+                ).fetchall()
+                for key, value, expires in rows:
+                    found[key] = (json.loads(value), expires)
+        finally:
+            conn.close()
+        return found
+
+    def set(self, key, value, expires):
+        conn = self._connect()
+        try:
+            conn.execute(
+                'INSERT OR REPLACE INTO result_cache (key, value, expires) VALUES (?, ?, ?)',
+                (key, json.dumps(value), expires)
+            )
+        finally:
+            conn.close()
+
+    def delete(self, key):
+        conn = self._connect()
+        try:
+            conn.execute('DELETE FROM result_cache WHERE key = ?', (key,))
+        finally:
+            conn.close()
+
+
+class ResultCache:
+    """
+    Per-service-number scrape results with a TTL.
+
+    Lookups go to an in-process LRU first and then to an optional shared
+    store. Entries live for ttl seconds from when they were scraped; the
+    in-process copy of a shared entry is only trusted for memory_ttl seconds
+    so invalidations from other processes are seen promptly.
+    """
+
+    def __init__(self, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES, shared=None,
+                 memory_ttl=DEFAULT_MEMORY_TTL):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.shared = shared
+        self.memory_ttl = memory_ttl if shared else ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, ttl=None, db_path=None):
+        """Build a cache from a TTL in seconds and an optional shared SQLite file"""
+        shared = SQLiteResultStore(db_path) if db_path else None
+        return cls(ttl=float(ttl) if ttl else DEFAULT_TTL, shared=shared)
+
+    def _remember(self, key, value, expires):
+        # Called with self._lock held
+        self._entries[key] = (value, min(expires, time.time() + self.memory_ttl))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, key):
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys):
+        """Return {key: value} for the keys with a fresh cached result"""
+        found = {}
+        misses = []
+        now = time.time()
+
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry and entry[1] > now:
+                    self._entries.move_to_end(key)
+                    found[key] = entry[0]
+                else:
+                    if entry:
+                        del self._entries[key]
+                    misses.append(key)
+
+        if misses and self.shared:
+            try:
+                shared_found = self.shared.get_many(misses)
+            except Exception as e:
+                logger.error(f"Result cache store error: {str(e)}")
+                shared_found = {}
+            with self._lock:
+                for key, (value, expires) in shared_found.items():
+                    self._remember(key, value, expires)
+                    found[key] = value
+
+        return found
+
+    def set(self, key, value, scraped_at=None):
+        """Cache a result scraped at scraped_at (a Unix time, default now)"""
+        expires = (scraped_at or time.time()) + self.ttl
+        if expires <= time.time():
+            return
+
+        with self._lock:
+            self._remember(key, value, expires)
+        if self.shared:
+            try:
+                self.shared.set(key, value, expires)
+            except Exception as e:
+                logger.error(f"Result cache store error: {str(e)}")
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+        if self.shared:
+            try:
+                self.shared.delete(key)
+            except Exception as e:
+                logger.error(f"Result cache store error: {str(e)}")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
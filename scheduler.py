@@ -0,0 +1,151 @@
+import logging
+import math
+import threading
+import time
+from datetime import datetime, timedelta
+from models import db, ServiceNumber, BillHistory
+
+logger = logging.getLogger(__name__)
+
+# Accounts whose latest bill is unpaid or due are refreshed more often
+DEFAULT_STALE_AFTER = timedelta(hours=24)
+DEFAULT_DUE_STALE_AFTER = timedelta(hours=6)
+
+# Seconds between scheduler ticks, and the most numbers queued per tick
+DEFAULT_INTERVAL = 60
+DEFAULT_MAX_BATCH = 50
+
+
+def latest_bill_status():
+    """Status of each service number's newest bill, as a correlated subquery"""
+    return (
+        db.select(BillHistory.status)
+        .where(BillHistory.service_number_id == ServiceNumber.id)
+        .order_by(BillHistory.bill_date.desc().nulls_last(), BillHistory.id.desc())
+        .limit(1)
+        .correlate(ServiceNumber)
+        .scalar_subquery()
+    )
+
+
+class RefreshScheduler:
+    """
+    Background refresh of tracked service numbers.
+
+    Each tick queues the stalest numbers: never-scraped first, then accounts
+    with an unpaid or due bill, then by last_scraped. The batch size is the
+    share of all tracked numbers that falls due per tick, so a full refresh
+    is spread evenly over the stale_after window (a day by default, well
+    inside a monthly billing cycle) instead of arriving in bursts. Numbers
+    are claimed with a conditional update of last_scheduled, so concurrent
+    schedulers in other processes never queue the same number twice.
+    Scraping itself goes through the normal job queue and rate limiter.
+    """
+
+    def __init__(self, app, enqueue, stale_after=DEFAULT_STALE_AFTER,
+                 due_stale_after=DEFAULT_DUE_STALE_AFTER, interval=DEFAULT_INTERVAL,
+                 max_batch=DEFAULT_MAX_BATCH, busy=None):
+        self.app = app
+        self.enqueue = enqueue
+        self.stale_after = stale_after
+        self.due_stale_after = due_stale_after
+        self.interval = interval
+        self.max_batch = max_batch
+        self.busy = busy
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def batch_size(self):
+        """Numbers to queue per tick so every account is refreshed once per stale_after"""
+        tracked = db.session.execute(db.select(db.func.count(ServiceNumber.id))).scalar()
+        ticks_per_cycle = max(1.0, self.stale_after.total_seconds() / self.interval)
+        return min(self.max_batch, max(1, math.ceil(tracked / ticks_per_cycle)))
+
+    def _is_due(self):
+        status = db.func.lower(db.func.coalesce(latest_bill_status(), ''))
+        return db.or_(status.contains('unpaid'), status.contains('due'))
+
+    def _not_scheduled_since(self, now):
+        """
+        Numbers not queued within their stale window. Numbers queued recently
+        but not yet scraped successfully (failures included) wait their turn again.
+        """
+        cutoff = db.case((self._is_due(), now - self.due_stale_after), else_=now - self.stale_after)
+        return db.or_(ServiceNumber.last_scheduled.is_(None), ServiceNumber.last_scheduled < cutoff)
+
+    def stale_numbers(self, limit, now=None):
+        """The service numbers most in need of a refresh, most urgent first"""
+        now = now or datetime.utcnow()
+        is_due = self._is_due()
+        cutoff = db.case((is_due, now - self.due_stale_after), else_=now - self.stale_after)
+
+        query = (
+            db.select(ServiceNumber.service_number)
+            .where(
+                db.or_(ServiceNumber.last_scraped.is_(None), ServiceNumber.last_scraped < cutoff),
+                self._not_scheduled_since(now)
+            )
+            .order_by(
+                ServiceNumber.last_scraped.is_not(None),
+                db.case((is_due, 0), else_=1),
+                ServiceNumber.last_scraped
+            )
+            .limit(limit)
+        )
+        return list(db.session.execute(query).scalars())
+
+    def claim(self, numbers, now):
+        """
+        Mark numbers as scheduled at now, skipping any another scheduler
+        claimed since they were selected. Returns the claimed numbers in order.
+        """
+        if not numbers:
+            return []
+        claimed = set(db.session.execute(
+            db.update(ServiceNumber)
+            .where(ServiceNumber.service_number.in_(numbers), self._not_scheduled_since(now))
+            .values(last_scheduled=now)
+            .returning(ServiceNumber.service_number)
+            .execution_options(synchronize_session=False)
+        ).scalars())
+        db.session.commit()
+        return [number for number in numbers if number in claimed]
+
+    def run_once(self, limit=None):
+        """
+        Queue one batch of stale numbers, of limit numbers or one scheduler
+        batch when None. Returns (job id or None, numbers).
+        """
+        now = datetime.utcnow()
+        if limit is None:
+            limit = self.batch_size()
+        if limit < 1:
+            return None, []
+
+        numbers = self.claim(self.stale_numbers(limit, now), now)
+        if not numbers:
+            return None, []
+
+        job_id = self.enqueue(numbers)
+        logger.info(f"Scheduled refresh job {job_id} for {len(numbers)} service numbers")
+        return job_id, numbers
+
+    def start(self):
+        """Run ticks on a daemon thread in this process, once"""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="refresh-scheduler", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            # Let the previous batch drain before queueing more
+            if self.busy and self.busy():
+                continue
+            try:
+                with self.app.app_context():
+                    self.run_once()
+            except Exception as e:
+                logger.error(f"Error in refresh scheduler: {str(e)}")
@@ -1,20 +1,37 @@
-import requests
-from bs4 import BeautifulSoup
 import time
 import logging
-from datetime import datetime, timedelta
+from datetime import date, timedelta
 import re
-from urllib.parse import urljoin, urlparse
 import json
+import multiprocessing
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from dates import parse_date
+from cell_classifier import classify_row, infer_column_roles
+from html_parser import (
+    parse_html, keyword_pattern, tag_contains, outermost,
+    LANDING_PAGE_TAGS, RESULT_PAGE_TAGS, TABLE_TAGS
+)
+from http_session import get_session, get_pool_stats
+from http_cache import request_key, fingerprint
+from ratelimit import RateLimiter
+from site_plans import SitePlan, SitePlanCache
+from crawl_frontier import CrawlFrontier, DEFAULT_REQUEST_BUDGET, DEFAULT_MAX_DEPTH
+from metrics import timed, site_run, record_request, record_error, record_cache
 
 logger = logging.getLogger(__name__)
 
+# Keyword patterns compiled once and matched in a single regex search
+TABLE_KEYWORD_PATTERN = keyword_pattern(['bill', 'payment', 'amount', 'due'])
+DIV_KEYWORD_PATTERN = keyword_pattern(['bill', 'amount', 'due', 'payment'])
+BILL_INFO_PATTERN = keyword_pattern(['bill', 'amount', 'due', 'payment', 'paid', 'outstanding', 'balance'])
+
 class TGSPDCLScraper:
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
+    def __init__(self, concurrent=True, rate_limiter=None, site_plans=None, session=None,
+                 parser_backend=None, page_cache=None, crawl_budget=DEFAULT_REQUEST_BUDGET,
+                 crawl_depth=DEFAULT_MAX_DEPTH, parse_workers=0):
+        # Shared, pooled session with enforced timeouts and retries
+        self.session = session or get_session()
         
         # Target websites - prioritize most reliable sources
         self.websites = [
@@ -24,28 +41,59 @@ class TGSPDCLScraper:
             'https://www.billdesk.com/pgidsk/pgmerc/tsspdclpgi/TSSPDCLPGIDetails.jsp'
         ]
         
-        # Configure session with timeout and retries
-        self.session.timeout = 15
-        
-    def get_bill_history(self, service_number):
+        # Query all websites for a number in parallel; politeness is enforced
+        # per host by the rate limiter
+        self.concurrent = concurrent
+        self.rate_limiter = rate_limiter or RateLimiter()
+        
+        # Landing pages and their forms are parsed once per TTL and reused
+        # for every service number in a batch
+        self.site_plans = site_plans or SitePlanCache()
+        
+        # BeautifulSoup backend; None uses lxml when installed
+        self.parser_backend = parser_backend
+        
+        # Optional http_cache.PageCache: pages the server reports unchanged,
+        # or whose content hash matches, reuse what was extracted last time
+        self.page_cache = page_cache
+        
+        # Each service number gets a crawl frontier with this request budget
+        # and link depth, shared by all sites, with each site's landing page
+        # and first form held back from link following
+        self.crawl_budget = crawl_budget
+        self.crawl_depth = crawl_depth
+        
+        # With parse_workers > 0, result pages are parsed in a pool of worker
+        # processes: fetch threads hand over the raw bytes and wait for bill
+        # dicts without holding the GIL, so fetching and parsing overlap and
+        # parsing uses every core
+        self.parse_workers = parse_workers
+        self._parse_pool = None
+        self._parse_pool_lock = threading.Lock()
+        
+    def get_bill_history(self, service_number, site_runs=None):
         """
-        Scrape bill history for a given service number from multiple websites
+        Scrape bill history for a given service number from multiple websites.
+        When site_runs is a list, a metrics.SiteRun per website is added to it.
         """
-        all_bills = []
+        site_runs = [] if site_runs is None else site_runs
+        frontier = CrawlFrontier(budget=self.crawl_budget, max_depth=self.crawl_depth, sites=self.websites)
         
-        for website in self.websites:
-            try:
-                logger.info(f"Scraping {website} for service number {service_number}")
-                bills = self._scrape_website(website, service_number)
-                if bills:
-                    all_bills.extend(bills)
-                    
-            except Exception as e:
-                logger.error(f"Error scraping {website}: {str(e)}")
-                continue
-            
-            # Add delay between website requests
-            time.sleep(1)
+        if self.concurrent:
+            with ThreadPoolExecutor(max_workers=len(self.websites)) as executor:
+                site_results = list(executor.map(
+                    lambda website: self._scrape_site(website, service_number, frontier, site_runs), self.websites
+                ))
+        else:
+            site_results = [
+                self._scrape_site(website, service_number, frontier, site_runs) for website in self.websites
+            ]
+        
+        logger.debug(f"Made {frontier.requests} of {frontier.budget} budgeted requests for {service_number}")
+        
+        all_bills = []
+        for bills in site_results:
+            all_bills.extend(bills)
         
         # Remove duplicates and sort by date
         unique_bills = self._remove_duplicates(all_bills)
@@ -55,25 +103,155 @@ class TGSPDCLScraper:
         
         return filtered_bills
     
-    def _scrape_website(self, url, service_number):
+    def pool_stats(self):
+        """Keep-alive connection pool statistics for the scraper's HTTP client"""
+        return get_pool_stats(self.session)
+    
+    def _scrape_site(self, website, service_number, frontier, site_runs):
+        """
+        Scrape one website, never letting a failure escape into the other sites
+        """
+        site_frontier = frontier.site(website)
+        with site_run(website) as run:
+            try:
+                logger.info(f"Scraping {website} for service number {service_number}")
+                bills = self._scrape_website(website, service_number, site_frontier) or []
+            except Exception as e:
+                logger.error(f"Error scraping {website}: {str(e)}")
+                record_error(e)
+                bills = []
+            finally:
+                site_frontier.release()
+            run.bills_found = len(bills)
+        
+        site_runs.append(run)
+        return bills
+    
+    def _request(self, method, url, **kwargs):
+        """
+        Send a request through the shared session once the host's rate limit allows it
+        """
+        wait = self.rate_limiter.acquire(url)
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, url, **kwargs)
+        except Exception as e:
+            record_request(method, url, type(e).__name__, 0, wait, time.perf_counter() - start)
+            raise
+        record_request(method, url, response.status_code, len(response.content), wait, time.perf_counter() - start)
+        return response
+    
+    def _fetch_extracted(self, method, url, extract, scope=None, **kwargs):
+        """
+        Fetch a page and return extract(content), which must be JSON-serialisable.
+        The extraction is cached per request and scope, so pass a scope when it
+        depends on more than the request itself.
+        
+        With a page cache, GETs are revalidated with the stored ETag and
+        Last-Modified, and a 304 or a body with an unchanged content hash
+        returns the stored extraction without parsing the page again.
+        """
+        if self.page_cache is None:
+            response = self._request(method, url, **kwargs)
+            response.raise_for_status()
+            return extract(response.content)
+        
+        key = request_key(method, url, kwargs.get('params'), kwargs.get('data'), scope)
+        entry = self._page_cache_call('get', key)
+        
+        headers = {}
+        if entry and method == 'GET':
+            if entry['etag']:
+                headers['If-None-Match'] = entry['etag']
+            if entry['last_modified']:
+                headers['If-Modified-Since'] = entry['last_modified']
+        
+        response = self._request(method, url, headers=headers, **kwargs)
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        
+        if response.status_code == 304 and entry:
+            logger.debug(f"Not modified: {url}")
+            record_cache('page', 'not_modified')
+            self._page_cache_call('touch', key, etag, last_modified)
+            return entry['extracted']
+        
+        response.raise_for_status()
+        content_hash = fingerprint(response.content)
+        
+        if entry and entry['fingerprint'] == content_hash:
+            logger.debug(f"Unchanged content: {url}")
+            record_cache('page', 'unchanged')
+            self._page_cache_call('touch', key, etag, last_modified)
+            return entry['extracted']
+        
+        record_cache('page', 'miss')
+        extracted = extract(response.content)
+        self._page_cache_call('put', key, etag, last_modified, content_hash, extracted)
+        return extracted
+    
+    def _page_cache_call(self, method, *args):
+        """
+        Call a page cache method, never letting a broken cache file stop scraping
+        """
+        try:
+            return getattr(self.page_cache, method)(*args)
+        except Exception as e:
+            logger.error(f"Page cache error on {method}: {str(e)}")
+            record_error(e)
+            return None
+    
+    def _scrape_website(self, url, service_number, frontier):
         """
         Scrape a specific website for bill history
         """
         try:
+            # Every site starts by fetching its landing page
+            if not frontier.visit(url):
+                return []
+            
             if 'tgsouthernpower.org' in url:
-                return self._scrape_tgsouthernpower(url, service_number)
+                return self._scrape_tgsouthernpower(url, service_number, frontier)
             elif 'billdesk.com' in url:
-                return self._scrape_billdesk(url, service_number)
+                return self._scrape_billdesk(url, service_number, frontier)
             elif 'webportal.tgsouthernpower.org' in url:
-                return self._scrape_webportal(url, service_number)
+                return self._scrape_webportal(url, service_number, frontier)
             else:
                 return self._generic_scrape(url, service_number)
                 
         except Exception as e:
             logger.error(f"Error scraping {url}: {str(e)}")
+            record_error(e)
             return []
     
-    def _scrape_tgsouthernpower(self, url, service_number):
+    def _get_site_plan(self, url):
+        """
+        Return the forms and bill links for a page, fetching and parsing it
+        only when no fresh plan is cached
+        """
+        built = []
+        
+        def build(plan_url):
+            built.append(plan_url)
+            return self._build_site_plan(plan_url)
+        
+        plan = self.site_plans.get_or_build(url, build)
+        record_cache('site_plan', 'miss' if built else 'hit')
+        return plan
+    
+    def _build_site_plan(self, url):
+        """
+        Fetch a landing page and extract its forms and bill-history links
+        """
+        def extract(content):
+            with timed('parse'):
+                soup = parse_html(content, LANDING_PAGE_TAGS, self.parser_backend)
+            with timed('plan'):
+                return SitePlan.from_soup(soup, url).to_dict()
+        
+        return SitePlan.from_dict(self._fetch_extracted('GET', url, extract))
+    
+    def _scrape_tgsouthernpower(self, url, service_number, frontier):
         """
         Scrape tgsouthernpower.org websites
         """
@@ -81,93 +259,69 @@ class TGSPDCLScraper:
         
         try:
             # Try to find bill history page or search functionality
-            response = self.session.get(url)
-            response.raise_for_status()
+            plan = self._get_site_plan(url)
             
-            soup = BeautifulSoup(response.content, 'html.parser')
+            # Submit forms with an input that looks like it takes a service number
+            for form in plan.forms:
+                if form.input_keywords and frontier.claim_form(form.method, form.action_url):
+                    bills.extend(self._submit_form_and_parse(form, service_number))
             
-            # Look for forms that might accept service numbers
-            forms = soup.find_all('form')
+            # Also try links to bill history, best first, within the
+            # frontier's depth and request budget
+            for link_url in plan.links:
+                frontier.add(link_url, 1)
             
-            for form in forms:
-                # Look for input fields that might be for service numbers
-                inputs = form.find_all('input')
-                for input_field in inputs:
-                    if any(keyword in str(input_field).lower() for keyword in 
-                          ['service', 'consumer', 'account', 'number']):
-                        
-                        # Try to submit the form with the service number
-                        bills.extend(self._submit_form_and_parse(form, url, service_number))
-                        break
-            
-            # Also try to find direct links to bill history
-            links = soup.find_all('a', href=True)
-            for link in links:
-                href = link['href']
-                if any(keyword in href.lower() for keyword in ['bill', 'history', 'payment']):
-                    full_url = urljoin(url, href)
-                    bills.extend(self._follow_link_and_search(full_url, service_number))
+            while True:
+                link = frontier.pop()
+                if link is None:
+                    break
+                link_url, depth = link
+                bills.extend(self._follow_link_and_search(link_url, service_number, frontier, depth))
             
         except Exception as e:
             logger.error(f"Error scraping tgsouthernpower: {str(e)}")
+            record_error(e)
         
         return bills
     
-    def _scrape_billdesk(self, url, service_number):
+    def _scrape_billdesk(self, url, service_number, frontier):
         """
         Scrape billdesk.com for payment history
         """
         bills = []
         
         try:
-            response = self.session.get(url)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Look for payment gateway forms
-            forms = soup.find_all('form')
+            plan = self._get_site_plan(url)
             
-            for form in forms:
-                # Try to find service number input
-                inputs = form.find_all('input')
-                service_input = None
-                
-                for input_field in inputs:
-                    if any(keyword in str(input_field).lower() for keyword in 
-                          ['service', 'consumer', 'account']):
-                        service_input = input_field
-                        break
-                
-                if service_input:
-                    bills.extend(self._submit_billdesk_form(form, url, service_number))
+            # Look for payment gateway forms with a service number input
+            for form in plan.forms:
+                if form.input_keywords & {'service', 'consumer', 'account'} and \
+                        frontier.claim_form('POST', form.action_url):
+                    bills.extend(self._submit_billdesk_form(form, service_number))
             
         except Exception as e:
             logger.error(f"Error scraping billdesk: {str(e)}")
+            record_error(e)
         
         return bills
     
-    def _scrape_webportal(self, url, service_number):
+    def _scrape_webportal(self, url, service_number, frontier):
         """
         Scrape webportal.tgsouthernpower.org
         """
         bills = []
         
         try:
-            response = self.session.get(url)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
+            plan = self._get_site_plan(url)
             
             # Look for billing information forms
-            forms = soup.find_all('form')
-            
-            for form in forms:
-                if 'billing' in str(form).lower():
-                    bills.extend(self._submit_form_and_parse(form, url, service_number))
+            for form in plan.forms:
+                if form.mentions_billing and frontier.claim_form(form.method, form.action_url):
+                    bills.extend(self._submit_form_and_parse(form, service_number))
             
         except Exception as e:
             logger.error(f"Error scraping webportal: {str(e)}")
+            record_error(e)
         
         return bills
     
@@ -178,70 +332,56 @@ class TGSPDCLScraper:
         bills = []
         
         try:
-            response = self.session.get(url)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Look for tables that might contain bill information
-            tables = soup.find_all('table')
+            def extract(content):
+                with timed('parse'):
+                    soup = parse_html(content, TABLE_TAGS, self.parser_backend)
+                
+                # Look for tables that might contain bill information
+                with timed('classify'):
+                    table_bills = []
+                    for table in soup.find_all('table'):
+                        if tag_contains(table, TABLE_KEYWORD_PATTERN):
+                            table_bills.extend(parse_bill_table(table, service_number))
+                    return table_bills
             
-            for table in tables:
-                if any(keyword in str(table).lower() for keyword in 
-                      ['bill', 'payment', 'amount', 'due']):
-                    bills.extend(self._parse_bill_table(table, service_number))
+            # The bills are stamped with the service number, so cache them per number
+            bills.extend(self._fetch_extracted('GET', url, extract, scope=service_number))
             
         except Exception as e:
             logger.error(f"Error in generic scrape: {str(e)}")
+            record_error(e)
         
         return bills
     
-    def _submit_form_and_parse(self, form, base_url, service_number):
+    def _submit_form_and_parse(self, form, service_number):
         """
-        Submit a form with service number and parse results
+        Submit a planned form with service number and parse results
         """
         bills = []
         
         try:
-            # Extract form data
-            form_data = {}
-            action = form.get('action', '')
-            method = form.get('method', 'GET').upper()
-            
-            if not action:
+            if not form.action_url:
                 return bills
-                
-            full_action_url = urljoin(base_url, action)
             
-            # Fill form inputs
-            inputs = form.find_all('input')
-            for input_field in inputs:
-                name = input_field.get('name')
-                if name:
-                    if any(keyword in name.lower() for keyword in 
-                          ['service', 'consumer', 'account', 'number']):
-                        form_data[name] = service_number
-                    else:
-                        form_data[name] = input_field.get('value', '')
+            form_data = form.build_data(service_number)
             
-            # Submit form
-            if method == 'POST':
-                response = self.session.post(full_action_url, data=form_data)
+            # Submit form and parse response for bill information
+            if form.method == 'POST':
+                bills.extend(self._fetch_extracted(
+                    'POST', form.action_url, self._bill_extractor(service_number), data=form_data
+                ))
             else:
-                response = self.session.get(full_action_url, params=form_data)
-            
-            response.raise_for_status()
-            
-            # Parse response for bill information
-            soup = BeautifulSoup(response.content, 'html.parser')
-            bills.extend(self._parse_bill_response(soup, service_number))
+                bills.extend(self._fetch_extracted(
+                    'GET', form.action_url, self._bill_extractor(service_number), params=form_data
+                ))
             
         except Exception as e:
             logger.error(f"Error submitting form: {str(e)}")
+            record_error(e)
         
         return bills
     
-    def _submit_billdesk_form(self, form, base_url, service_number):
+    def _submit_billdesk_form(self, form, service_number):
         """
         Special handling for billdesk forms
         """
@@ -251,187 +391,68 @@ class TGSPDCLScraper:
             # Billdesk might have specific form handling
             form_data = {'consumerNumber': service_number}
             
-            action = form.get('action', '')
-            if action:
-                full_url = urljoin(base_url, action)
-                response = self.session.post(full_url, data=form_data)
-                response.raise_for_status()
-                
-                soup = BeautifulSoup(response.content, 'html.parser')
-                bills.extend(self._parse_bill_response(soup, service_number))
+            if form.action_url:
+                bills.extend(self._fetch_extracted(
+                    'POST', form.action_url, self._bill_extractor(service_number), data=form_data
+                ))
             
         except Exception as e:
             logger.error(f"Error with billdesk form: {str(e)}")
+            record_error(e)
         
         return bills
     
-    def _follow_link_and_search(self, url, service_number):
+    def _follow_link_and_search(self, url, service_number, frontier, depth):
         """
-        Follow a link and search for bill information
+        Follow a link and search for bill information, queueing the page's
+        own bill links one level deeper
         """
         bills = []
         
         try:
-            response = self.session.get(url)
-            response.raise_for_status()
+            plan = self._get_site_plan(url)
             
-            soup = BeautifulSoup(response.content, 'html.parser')
+            # Submit every form on the page not already submitted elsewhere
+            for form in plan.forms:
+                if frontier.claim_form(form.method, form.action_url):
+                    bills.extend(self._submit_form_and_parse(form, service_number))
             
-            # Look for forms to submit service number
-            forms = soup.find_all('form')
-            for form in forms:
-                bills.extend(self._submit_form_and_parse(form, url, service_number))
+            for link_url in plan.links:
+                frontier.add(link_url, depth + 1)
             
         except Exception as e:
             logger.error(f"Error following link {url}: {str(e)}")
+            record_error(e)
         
         return bills
     
-    def _parse_bill_response(self, soup, service_number):
-        """
-        Parse HTML response for bill information
-        """
-        bills = []
-        
-        try:
-            # Look for tables with bill data
-            tables = soup.find_all('table')
-            
-            for table in tables:
-                bills.extend(self._parse_bill_table(table, service_number))
-            
-            # Look for div elements that might contain bill info
-            divs = soup.find_all('div')
-            for div in divs:
-                if any(keyword in str(div).lower() for keyword in 
-                      ['bill', 'amount', 'due', 'payment']):
-                    bills.extend(self._parse_bill_div(div, service_number))
-            
-        except Exception as e:
-            logger.error(f"Error parsing bill response: {str(e)}")
-        
-        return bills
-    
-    def _parse_bill_table(self, table, service_number):
-        """
-        Parse a table for bill information
-        """
-        bills = []
-        
-        try:
-            rows = table.find_all('tr')
-            
-            for row in rows:
-                cells = row.find_all(['td', 'th'])
-                
-                if len(cells) >= 3:  # Assume at least 3 columns for meaningful data
-                    bill_data = {}
-                    
-                    # Extract text from cells
-                    cell_texts = [cell.get_text(strip=True) for cell in cells]
-                    
-                    # Try to identify bill information patterns
-                    for i, text in enumerate(cell_texts):
-                        # Look for dates
-                        if self._is_date(text):
-                            bill_data['date'] = text
-                        
-                        # Look for amounts
-                        elif self._is_amount(text):
-                            bill_data['amount'] = text
-                        
-                        # Look for bill numbers
-                        elif self._is_bill_number(text):
-                            bill_data['bill_number'] = text
-                        
-                        # Look for status
-                        elif any(status in text.lower() for status in ['paid', 'unpaid', 'due']):
-                            bill_data['status'] = text
-                    
-                    if bill_data and ('date' in bill_data or 'amount' in bill_data):
-                        bill_data['service_number'] = service_number
-                        bill_data['source'] = 'scraped'
-                        bills.append(bill_data)
-            
-        except Exception as e:
-            logger.error(f"Error parsing bill table: {str(e)}")
-        
-        return bills
+    def _bill_extractor(self, service_number):
+        """Extraction for a form result page: parse it and return its bills"""
+        def extract(content):
+            if self.parse_workers:
+                # Parse and classification both happen in the worker
+                with timed('parse_pool'):
+                    future = self._get_parse_pool().submit(parse_bill_page, content, service_number, self.parser_backend)
+                    return future.result()
+            with timed('parse'):
+                soup = parse_html(content, RESULT_PAGE_TAGS, self.parser_backend)
+            with timed('classify'):
+                return parse_bill_response(soup, service_number)
+        return extract
     
-    def _parse_bill_div(self, div, service_number):
+    def _get_parse_pool(self):
         """
-        Parse a div element for bill information
+        Start the parse worker processes on first use, so they belong to the
+        process that scrapes (gunicorn forks workers after importing the app)
         """
-        bills = []
-        
-        try:
-            text = div.get_text(strip=True)
-            
-            # Look for patterns in the text
-            if self._contains_bill_info(text):
-                bill_data = {
-                    'service_number': service_number,
-                    'source': 'scraped',
-                    'raw_text': text
-                }
-                
-                # Try to extract specific information
-                date_match = re.search(r'\d{1,2}[/-]\d{1,2}[/-]\d{2,4}', text)
-                if date_match:
-                    bill_data['date'] = date_match.group()
-                
-                amount_match = re.search(r'₹?\s*(\d+(?:,\d+)*(?:\.\d{2})?)', text)
-                if amount_match:
-                    bill_data['amount'] = amount_match.group()
-                
-                bills.append(bill_data)
-            
-        except Exception as e:
-            logger.error(f"Error parsing bill div: {str(e)}")
-        
-        return bills
-    
-    def _is_date(self, text):
-        """Check if text looks like a date"""
-        date_patterns = [
-            r'\d{1,2}[/-]\d{1,2}[/-]\d{2,4}',
-            r'\d{1,2}-\w{3}-\d{2,4}',
-            r'\w{3}\s+\d{1,2},?\s+\d{4}'
-        ]
-        
-        for pattern in date_patterns:
-            if re.search(pattern, text):
-                return True
-        
-        return False
-    
-    def _is_amount(self, text):
-        """Check if text looks like a monetary amount"""
-        amount_patterns = [
-            r'₹\s*\d+(?:,\d+)*(?:\.\d{2})?',
-            r'\d+(?:,\d+)*(?:\.\d{2})?\s*₹',
-            r'Rs\.?\s*\d+(?:,\d+)*(?:\.\d{2})?'
-        ]
-        
-        for pattern in amount_patterns:
-            if re.search(pattern, text):
-                return True
-        
-        # Also check for plain numbers that might be amounts
-        if re.search(r'\d+(?:,\d+)*(?:\.\d{2})?', text) and len(text) <= 20:
-            return True
-        
-        return False
-    
-    def _is_bill_number(self, text):
-        """Check if text looks like a bill number"""
-        # Bill numbers are usually alphanumeric with specific patterns
-        return re.search(r'[A-Z0-9]{6,}', text) is not None
-    
-    def _contains_bill_info(self, text):
-        """Check if text contains bill-related information"""
-        keywords = ['bill', 'amount', 'due', 'payment', 'paid', 'outstanding', 'balance']
-        return any(keyword in text.lower() for keyword in keywords)
+        with self._parse_pool_lock:
+            if self._parse_pool is None:
+                # Forking a process that runs fetch threads can copy held
+                # locks; start workers from a clean interpreter instead
+                methods = multiprocessing.get_all_start_methods()
+                context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+                self._parse_pool = ProcessPoolExecutor(max_workers=self.parse_workers, mp_context=context)
+            return self._parse_pool
     
     def _remove_duplicates(self, bills):
         """Remove duplicate bills based on date and amount"""
@@ -449,16 +470,19 @@ class TGSPDCLScraper:
         return unique_bills
     
     def _filter_last_20_months(self, bills):
-        """Filter bills to last 20 months"""
+        """
+        Filter bills to last 20 months. Each bill's date is parsed once and
+        kept on the bill as 'bill_date' for the database layer.
+        """
         try:
             # Calculate date 20 months ago
-            current_date = datetime.now()
-            twenty_months_ago = current_date - timedelta(days=20*30)  # Approximate
+            twenty_months_ago = date.today() - timedelta(days=20*30)  # Approximate
             
             filtered_bills = []
             
             for bill in bills:
-                bill_date = self._parse_date(bill.get('date', ''))
+                bill_date = parse_date(bill.get('date', ''))
+                bill['bill_date'] = bill_date
                 
                 if bill_date and bill_date >= twenty_months_ago:
                     filtered_bills.append(bill)
@@ -467,34 +491,130 @@ class TGSPDCLScraper:
                     filtered_bills.append(bill)
             
             # Sort by date (most recent first)
-            filtered_bills.sort(key=lambda x: self._parse_date(x.get('date', '')) or datetime.min, reverse=True)
+            filtered_bills.sort(key=lambda x: x['bill_date'] or date.min, reverse=True)
             
             return filtered_bills
         
         except Exception as e:
             logger.error(f"Error filtering bills: {str(e)}")
+            record_error(e)
             return bills
+
+
+# Bill extraction from parsed pages. These are pure functions of the page,
+# so parse pool worker processes can run them without a scraper instance.
+def parse_bill_response(soup, service_number):
+    """
+    Parse HTML response for bill information
+    """
+    bills = []
     
-    def _parse_date(self, date_str):
-        """Parse date string to datetime object"""
-        if not date_str:
-            return None
-        
-        date_formats = [
-            '%d/%m/%Y',
-            '%d-%m-%Y',
-            '%d/%m/%y',
-            '%d-%m-%y',
-            '%Y-%m-%d',
-            '%d-%b-%Y',
-            '%d %b %Y',
-            '%b %d, %Y'
-        ]
+    try:
+        # Look for tables with bill data
+        tables = soup.find_all('table')
+        
+        for table in tables:
+            bills.extend(parse_bill_table(table, service_number))
+        
+        # Look for div elements that might contain bill info. Only the
+        # outermost divs are checked: a nested div is part of its parent's
+        # text, so parsing it again would count the same bill twice.
+        for div in outermost(soup.find_all('div')):
+            if tag_contains(div, DIV_KEYWORD_PATTERN):
+                bills.extend(parse_bill_div(div, service_number))
+        
+    except Exception as e:
+        logger.error(f"Error parsing bill response: {str(e)}")
+        record_error(e)
+    
+    return bills
+
+
+def parse_bill_table(table, service_number):
+    """
+    Parse a table for bill information
+    """
+    bills = []
+    
+    try:
+        rows = table.find_all('tr')
         
-        for fmt in date_formats:
-            try:
-                return datetime.strptime(date_str, fmt)
-            except ValueError:
-                continue
+        # Column roles come from the header row, once per table
+        roles = None
         
-        return None
+        for row in rows:
+            cells = row.find_all(['td', 'th'])
+            
+            if len(cells) >= 3:  # Assume at least 3 columns for meaningful data
+                # Extract text from cells
+                cell_texts = [cell.get_text(strip=True) for cell in cells]
+                
+                if roles is None:
+                    header_roles = infer_column_roles(cell_texts)
+                    if header_roles:
+                        roles = header_roles
+                        continue
+                
+                bill_data = classify_row(cell_texts, roles)
+                
+                if bill_data and ('date' in bill_data or 'amount' in bill_data):
+                    # Once data rows start, later rows are not headers
+                    roles = roles or {}
+                    bill_data['service_number'] = service_number
+                    bill_data['source'] = 'scraped'
+                    bills.append(bill_data)
+        
+    except Exception as e:
+        logger.error(f"Error parsing bill table: {str(e)}")
+        record_error(e)
+    
+    return bills
+
+
+def parse_bill_div(div, service_number):
+    """
+    Parse a div element for bill information
+    """
+    bills = []
+    
+    try:
+        text = div.get_text(strip=True)
+        
+        # Look for patterns in the text
+        if contains_bill_info(text):
+            bill_data = {
+                'service_number': service_number,
+                'source': 'scraped',
+                'raw_text': text
+            }
+            
+            # Try to extract specific information
+            date_match = re.search(r'\d{1,2}[/-]\d{1,2}[/-]\d{2,4}', text)
+            if date_match:
+                bill_data['date'] = date_match.group()
+            
+            amount_match = re.search(r'₹?\s*(\d+(?:,\d+)*(?:\.\d{2})?)', text)
+            if amount_match:
+                bill_data['amount'] = amount_match.group()
+            
+            bills.append(bill_data)
+        
+    except Exception as e:
+        logger.error(f"Error parsing bill div: {str(e)}")
+        record_error(e)
+    
+    return bills
+
+
+def contains_bill_info(text):
+    """Check if text contains bill-related information"""
+    return BILL_INFO_PATTERN.search(text) is not None
+
+
+def parse_bill_page(content, service_number, parser_backend=None):
+    """
+    Parse a form result page into bill dicts. Runs in parse worker processes,
+    so it takes raw bytes and returns plain picklable dicts.
+    """
+    soup = parse_html(content, RESULT_PAGE_TAGS, parser_backend)
+    return parse_bill_response(soup, service_number)
@@ -0,0 +1,157 @@
+import logging
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from sqlalchemy.exc import IntegrityError
+from models import db, ScrapeLease
+
+logger = logging.getLogger(__name__)
+
+# A lease outlives its owner by at most this long if the process dies; the
+# owner renews it every third of that while the work runs
+DEFAULT_LEASE_SECONDS = 300
+DEFAULT_POLL_SECONDS = 0.5
+
+# Longest a caller waits for another process's lease before giving up
+DEFAULT_MAX_WAIT_SECONDS = 60
+
+
+class LeaseWaitTimeout(Exception):
+    """Raised when another process held a key's lease for longer than the caller may wait"""
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent work on the same key.
+
+    Within a process, the first caller for a key runs the work and later
+    callers wait for its result. Across processes, the runner first takes
+    a lease row in scrape_leases, waiting up to max_wait_seconds while
+    another process holds it, and keeps the lease renewed until the work
+    finishes. The work function runs under the lease, so it should re-check
+    for a result that a previous lease holder produced before doing the work.
+    """
+
+    def __init__(self, lease_seconds=DEFAULT_LEASE_SECONDS, poll_seconds=DEFAULT_POLL_SECONDS,
+                 max_wait_seconds=DEFAULT_MAX_WAIT_SECONDS):
+        self.lease_seconds = lease_seconds
+        self.poll_seconds = poll_seconds
+        self.max_wait_seconds = max_wait_seconds
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def run(self, key, fn, on_timeout=None):
+        """
+        Run fn() once for all concurrent callers of key. Returns (result,
+        shared), where shared is True for callers that waited on another
+        thread's call. An exception from fn is raised in every caller.
+
+        When another process holds the lease past max_wait_seconds, the
+        result of on_timeout() is used instead, or LeaseWaitTimeout is
+        raised when it is not given.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = self._run_leased(key, fn, on_timeout)
+            return call.result, False
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def _run_leased(self, key, fn, on_timeout):
+        owner = uuid.uuid4().hex
+        deadline = time.monotonic() + self.max_wait_seconds
+        while not self._acquire_lease(key, owner):
+            if time.monotonic() >= deadline:
+                logger.warning(f"Gave up waiting for the scrape lease on {key}")
+                if on_timeout is None:
+                    raise LeaseWaitTimeout(f"Lease on {key} held elsewhere for over {self.max_wait_seconds}s")
+                return on_timeout()
+            time.sleep(self.poll_seconds)
+
+        stop = threading.Event()
+        heartbeat = threading.Thread(
+            target=self._renew_lease, args=(db.engine, key, owner, stop),
+            name=f"lease-{key}", daemon=True
+        )
+        heartbeat.start()
+        try:
+            return fn()
+        finally:
+            stop.set()
+            heartbeat.join()
+            self._release_lease(key, owner)
+
+    def _renew_lease(self, engine, key, owner, stop):
+        """Push the lease's expiry forward until stop is set, so long work keeps it"""
+        table = ScrapeLease.__table__
+        while not stop.wait(self.lease_seconds / 3):
+            try:
+                with engine.begin() as conn:
+                    renewed = conn.execute(
+                        table.update()
+                        .where(table.c.key == key, table.c.owner == owner)
+                        .values(expires_at=datetime.utcnow() + timedelta(seconds=self.lease_seconds))
+                    ).rowcount
+                if not renewed:
+                    logger.warning(f"Lost scrape lease for {key}")
+                    return
+            except Exception as e:
+                # Try again on the next beat; the lease is still valid for a while
+                logger.error(f"Error renewing scrape lease for {key}: {str(e)}")
+
+    def _acquire_lease(self, key, owner):
+        """Take the lease for key, or an expired one. False if another owner holds it."""
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=self.lease_seconds)
+        table = ScrapeLease.__table__
+
+        try:
+            with db.engine.begin() as conn:
+                conn.execute(table.insert().values(key=key, owner=owner, expires_at=expires_at))
+            return True
+        except IntegrityError:
+            pass
+
+        with db.engine.begin() as conn:
+            result = conn.execute(
+                table.update()
+                .where(table.c.key == key, table.c.expires_at < now)
+                .values(owner=owner, expires_at=expires_at)
+            )
+        if result.rowcount == 1:
+            logger.warning(f"Took over expired scrape lease for {key}")
+            return True
+        return False
+
+    def _release_lease(self, key, owner):
+        try:
+            table = ScrapeLease.__table__
+            with db.engine.begin() as conn:
+                conn.execute(table.delete().where(table.c.key == key, table.c.owner == owner))
+        except Exception as e:
+            # The lease expires on its own
+            logger.error(f"Error releasing scrape lease for {key}: {str(e)}")
@@ -0,0 +1,179 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urljoin
+from html_parser import keyword_pattern, tag_contains, tag_text
+
+logger = logging.getLogger(__name__)
+
+# Keywords that mark an input as the service number field
+SERVICE_INPUT_KEYWORDS = ['service', 'consumer', 'account', 'number']
+
+# Keywords that mark a link as leading to bill history
+BILL_LINK_KEYWORDS = ['bill', 'history', 'payment']
+
+SERVICE_INPUT_PATTERN = keyword_pattern(SERVICE_INPUT_KEYWORDS)
+BILL_LINK_PATTERN = keyword_pattern(BILL_LINK_KEYWORDS)
+BILLING_FORM_PATTERN = keyword_pattern(['billing'])
+
+
+class FormPlan:
+    """
+    Everything needed to submit a form without re-parsing its page: the
+    resolved action URL, method, default field values and which fields
+    take the service number.
+    """
+
+    def __init__(self, action_url, method, fields, service_fields, input_keywords, mentions_billing):
+        self.action_url = action_url
+        self.method = method
+        self.fields = fields
+        self.service_fields = service_fields
+        self.input_keywords = input_keywords
+        self.mentions_billing = mentions_billing
+
+    @classmethod
+    def from_form(cls, form, base_url):
+        action = form.get('action', '')
+        fields = {}
+        service_fields = []
+        input_keywords = set()
+
+        for input_field in form.find_all('input'):
+            input_keywords.update(
+                match.group().lower() for match in SERVICE_INPUT_PATTERN.finditer(tag_text(input_field))
+            )
+
+            name = input_field.get('name')
+            if name:
+                if SERVICE_INPUT_PATTERN.search(name):
+                    service_fields.append(name)
+                fields[name] = input_field.get('value', '')
+
+        return cls(
+            action_url=urljoin(base_url, action) if action else None,
+            method=form.get('method', 'GET').upper(),
+            fields=fields,
+            service_fields=service_fields,
+            input_keywords=input_keywords,
+            mentions_billing=tag_contains(form, BILLING_FORM_PATTERN)
+        )
+
+    def to_dict(self):
+        return {
+            'action_url': self.action_url,
+            'method': self.method,
+            'fields': self.fields,
+            'service_fields': self.service_fields,
+            'input_keywords': sorted(self.input_keywords),
+            'mentions_billing': self.mentions_billing,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**dict(data, input_keywords=set(data['input_keywords'])))
+
+    def build_data(self, service_number):
+        """Form data with the service number filled into every service field"""
+        data = dict(self.fields)
+        for name in self.service_fields:
+            data[name] = service_number
+        return data
+
+
+class SitePlan:
+    """Forms and bill-history links extracted from one landing page"""
+
+    def __init__(self, url, forms, links):
+        self.url = url
+        self.forms = forms
+        self.links = links
+        self.created_at = time.monotonic()
+
+    @classmethod
+    def from_soup(cls, soup, url):
+        forms = [FormPlan.from_form(form, url) for form in soup.find_all('form')]
+
+        links = []
+        for link in soup.find_all('a', href=True):
+            href = link['href']
+            if BILL_LINK_PATTERN.search(href):
+                links.append(urljoin(url, href))
+
+        return cls(url, forms, links)
+
+    def to_dict(self):
+        """JSON-serialisable form, for the on-disk page cache"""
+        return {
+            'url': self.url,
+            'forms': [form.to_dict() for form in self.forms],
+            'links': self.links,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['url'], [FormPlan.from_dict(form) for form in data['forms']], data['links'])
+
+
+class SitePlanCache:
+    """
+    TTL-bounded cache of SitePlan objects keyed by URL, so a batch fetches
+    and parses each landing page once instead of once per service number.
+    """
+
+    def __init__(self, ttl=900, max_entries=256):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._plans = OrderedDict()
+        self._lock = threading.Lock()
+        # {url: [lock, threads using it]}, dropped when the last one is done
+        self._build_locks = {}
+
+    def get(self, url):
+        with self._lock:
+            plan = self._plans.get(url)
+            if plan is None:
+                return None
+            if time.monotonic() - plan.created_at > self.ttl:
+                del self._plans[url]
+                return None
+            self._plans.move_to_end(url)
+            return plan
+
+    def put(self, url, plan):
+        with self._lock:
+            self._plans[url] = plan
+            self._plans.move_to_end(url)
+            while len(self._plans) > self.max_entries:
+                self._plans.popitem(last=False)
+
+    def get_or_build(self, url, builder):
+        """
+        Return the cached plan for url, calling builder(url) on a miss. Only
+        one thread builds a given URL at a time; the others wait and reuse it.
+        """
+        plan = self.get(url)
+        if plan is not None:
+            return plan
+
+        with self._lock:
+            entry = self._build_locks.setdefault(url, [threading.Lock(), 0])
+            entry[1] += 1
+
+        try:
+            with entry[0]:
+                plan = self.get(url)
+                if plan is None:
+                    plan = builder(url)
+                    self.put(url, plan)
+                return plan
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._build_locks[url]
+
+    def clear(self):
+        with self._lock:
+            self._plans.clear()
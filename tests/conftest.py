@@ -0,0 +1,36 @@
+import os
+import tempfile
+
+import pytest
+from stub_portal import StubPortal
+
+# app.py configures its database and caches at import, so point them at a
+# scratch directory before any test imports it
+_scratch = tempfile.mkdtemp(prefix='bill-scraper-tests-')
+os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(_scratch, 'test.db')}")
+os.environ.setdefault('SCRAPER_PAGE_CACHE_DB', '')
+
+
+@pytest.fixture
+def portal():
+    portal = StubPortal().start()
+    yield portal
+    portal.stop()
+
+
+@pytest.fixture
+def app():
+    """The Flask app with empty tables and caches"""
+    import app as app_module
+    from models import db
+
+    with app_module.app.app_context():
+        db.drop_all()
+        db.create_all()
+    app_module.result_cache.clear()
+    yield app_module.app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
@@ -0,0 +1,138 @@
+"""
+A local stand-in for the utility portals, for scraper tests.
+
+Serves a tgsouthernpower-style landing page with a service number form and
+any number of bill links, and a billdesk-style landing page with a
+consumer number form. Both forms return a bill history table. A generic
+page serves the same bill table for any number. Site URLs
+carry the real host name in the query string so the scrapers dispatch to
+the matching site code.
+"""
+import threading
+from collections import Counter
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+
+def bill_rows(service_number, prefix, months=6):
+    """Bill table rows dated in the last few months, unique to each site"""
+    rows = []
+    for month in range(months):
+        bill_date = date.today().replace(day=1) - timedelta(days=30 * month)
+        amount = 100 + month + (500 if prefix == 'BD' else 0)
+        rows.append(
+            f'<tr><td>{bill_date:%d/%m/%Y}</td><td>Rs. {amount}.00</td>'
+            f'<td>{prefix}{service_number}{month:02d}</td><td>Paid</td></tr>'
+        )
+    return ''.join(rows)
+
+
+def result_page(service_number, prefix):
+    return (
+        '<html><body><table><tr><th>Bill Date</th><th>Amount</th><th>Bill No</th><th>Status</th></tr>'
+        f'{bill_rows(service_number, prefix)}</table></body></html>'
+    ).encode()
+
+
+class StubPortal:
+    """Threaded HTTP server counting every request as (method, path)"""
+
+    def __init__(self, bill_links=0):
+        self.bill_links = bill_links
+        self.hits = Counter()
+        # {path: responses to fail with 503 before serving it}
+        self.failures = Counter()
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self.server.daemon_threads = True
+        self.base_url = f'http://127.0.0.1:{self.server.server_address[1]}'
+
+    @property
+    def websites(self):
+        return [
+            f'{self.base_url}/tgsp/?site=tgsouthernpower.org',
+            f'{self.base_url}/billdesk/?site=billdesk.com',
+        ]
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def count(self, method, path_prefix):
+        with self._lock:
+            return sum(n for (m, path), n in self.hits.items() if m == method and path.startswith(path_prefix))
+
+    def tgsp_landing(self):
+        links = ''.join(f'<a href="/tgsp/bills/{i}">Bill history {i}</a>' for i in range(self.bill_links))
+        return (
+            f'<html><body><nav>{links}</nav>'
+            '<form action="/tgsp/lookup" method="post"><input type="text" name="serviceNo"></form>'
+            '</body></html>'
+        ).encode()
+
+    def _handler(self):
+        portal = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def send_page(self, body, status=200):
+                self.send_response(status)
+                self.send_header('Content-Type', 'text/html')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def record(self, method):
+                path = urlsplit(self.path).path
+                with portal._lock:
+                    portal.hits[(method, path)] += 1
+                    failing = portal.failures[path] > 0
+                    if failing:
+                        portal.failures[path] -= 1
+                if failing:
+                    self.send_page(b'Service unavailable', 503)
+                    return None
+                return path
+
+            def do_GET(self):
+                path = self.record('GET')
+                if path is None:
+                    return
+                if path == '/tgsp/':
+                    self.send_page(portal.tgsp_landing())
+                elif path.startswith('/tgsp/bills/'):
+                    self.send_page(b'<html><body><p>No bills here</p></body></html>')
+                elif path == '/generic/':
+                    # The same bill table whatever number is being scraped
+                    self.send_page(result_page('000', 'GN'))
+                elif path == '/billdesk/':
+                    self.send_page(
+                        b'<html><body><form action="/billdesk/pay" method="post">'
+                        b'<input type="text" name="consumerNumber"></form></body></html>'
+                    )
+                else:
+                    self.send_page(b'Not found', 404)
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                data = parse_qs(self.rfile.read(length).decode())
+                path = self.record('POST')
+                if path is None:
+                    return
+                if path == '/tgsp/lookup':
+                    self.send_page(result_page(data['serviceNo'][0], 'TG'))
+                elif path == '/billdesk/pay':
+                    self.send_page(result_page(data['consumerNumber'][0], 'BD'))
+                else:
+                    self.send_page(b'Not found', 404)
+
+        return Handler
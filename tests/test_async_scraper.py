@@ -0,0 +1,145 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from http_cache import PageCache
+from ratelimit import RateLimiter
+from scraper import TGSPDCLScraper
+
+async_scraper = pytest.importorskip('async_scraper')
+
+NUMBERS = ['1000001', '1000002', '1000003']
+
+
+@pytest.fixture
+def scraper(portal):
+    scraper = async_scraper.AsyncTGSPDCLScraper(rate_limiter=RateLimiter(default=(1000, 1000)))
+    scraper.websites = portal.websites
+    yield scraper
+    scraper.close()
+
+
+def bill_numbers(bills):
+    return sorted(bill['bill_number'] for bill in bills)
+
+
+def test_matches_thread_backend(portal, scraper):
+    threaded = TGSPDCLScraper(rate_limiter=RateLimiter(default=(1000, 1000)))
+    threaded.websites = portal.websites
+
+    expected = threaded.get_bill_history(NUMBERS[0])
+    bills = scraper.get_bill_history(NUMBERS[0])
+
+    assert len(bills) == 12
+    assert bill_numbers(bills) == bill_numbers(expected)
+    assert [bill['bill_date'] for bill in bills] == [bill['bill_date'] for bill in expected]
+
+
+def test_job_workers_share_one_client_and_plans(portal, scraper):
+    # Job workers call get_bill_history from their own threads
+    with ThreadPoolExecutor(len(NUMBERS)) as workers:
+        results = list(workers.map(scraper.get_bill_history, NUMBERS))
+
+    assert [len(bills) for bills in results] == [12, 12, 12]
+    # Each landing page is fetched once for all numbers
+    assert portal.count('GET', '/tgsp/') == 1
+    assert portal.count('GET', '/billdesk/') == 1
+    assert portal.count('POST', '/') == 2 * len(NUMBERS)
+
+    stats = scraper.pool_stats()
+    assert sum(host['requests'] for host in stats) == 2 + 2 * len(NUMBERS)
+    assert sum(host['misses'] for host in stats) <= scraper.host_concurrency
+
+
+def test_scrape_many(portal, scraper):
+    results = scraper.scrape_many(NUMBERS + NUMBERS[:1])
+
+    assert list(results) == NUMBERS
+    for number, bills in results.items():
+        assert {bill['service_number'] for bill in bills} == {number}
+        assert len(bills) == 12
+    assert portal.count('GET', '/tgsp/') == 1
+
+
+class RecordingPageCache(PageCache):
+    """PageCache remembering which threads used it"""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.threads = set()
+
+    def get(self, key):
+        self.threads.add(threading.current_thread().name)
+        return super().get(key)
+
+    def put(self, *args):
+        self.threads.add(threading.current_thread().name)
+        return super().put(*args)
+
+
+class RecordingRateLimiter(RateLimiter):
+    def __init__(self):
+        super().__init__(default=(1000, 1000))
+        self.threads = set()
+
+    def reserve(self, url):
+        self.threads.add(threading.current_thread().name)
+        return super().reserve(url)
+
+
+def test_sqlite_stores_are_used_off_the_event_loop(portal, tmp_path):
+    page_cache = RecordingPageCache(str(tmp_path / 'pages.db'))
+    rate_limiter = RecordingRateLimiter()
+    scraper = async_scraper.AsyncTGSPDCLScraper(rate_limiter=rate_limiter, page_cache=page_cache)
+    scraper.websites = portal.websites
+    try:
+        first = scraper.get_bill_history(NUMBERS[0])
+        second = scraper.get_bill_history(NUMBERS[0])
+    finally:
+        scraper.close()
+
+    assert bill_numbers(first) == bill_numbers(second)
+    assert len(first) == 12
+    assert page_cache.threads and 'async-scraper' not in page_cache.threads
+    assert rate_limiter.threads and 'async-scraper' not in rate_limiter.threads
+
+
+def test_pages_are_parsed_off_the_event_loop(portal, scraper):
+    threads = set()
+    bill_extractor = scraper._bill_extractor
+
+    def recording_extractor(service_number):
+        extract = bill_extractor(service_number)
+
+        def recording_extract(content):
+            threads.add(threading.current_thread().name)
+            return extract(content)
+
+        return recording_extract
+
+    scraper._bill_extractor = recording_extractor
+    assert len(scraper.get_bill_history(NUMBERS[0])) == 12
+    assert threads and 'async-scraper' not in threads
+
+
+@pytest.mark.parametrize('backend', ['threads', 'async'])
+def test_server_errors_are_retried(portal, scraper, backend):
+    if backend == 'threads':
+        scraper = TGSPDCLScraper(rate_limiter=RateLimiter(default=(1000, 1000)))
+        scraper.websites = portal.websites
+    portal.failures['/billdesk/pay'] = 1
+
+    bills = scraper.get_bill_history(NUMBERS[0])
+
+    assert len(bills) == 12
+    assert portal.count('POST', '/billdesk/pay') == 2
+
+
+def test_server_errors_give_up_after_retries(portal, scraper, monkeypatch):
+    monkeypatch.setattr(async_scraper, 'retry_backoff', lambda retry_number: 0)
+    portal.failures['/billdesk/pay'] = 10
+
+    bills = scraper.get_bill_history(NUMBERS[0])
+
+    assert {bill['bill_number'][:2] for bill in bills} == {'TG'}
+    assert portal.count('POST', '/billdesk/pay') == 1 + async_scraper.DEFAULT_RETRIES
@@ -0,0 +1,69 @@
+import pytest
+from crawl_frontier import CrawlFrontier
+from ratelimit import RateLimiter
+from scraper import TGSPDCLScraper
+
+
+def make_scraper(portal, **kwargs):
+    scraper = TGSPDCLScraper(rate_limiter=RateLimiter(default=(1000, 1000)), **kwargs)
+    scraper.websites = portal.websites
+    return scraper
+
+
+def test_links_cannot_spend_other_sites_reservations():
+    frontier = CrawlFrontier(budget=6, max_depth=1, sites=['a', 'b'])
+    a = frontier.site('a')
+    assert a.visit('http://a/')
+    for i in range(10):
+        a.add(f'http://a/bill/{i}', 1)
+
+    # a's own form reservation is given up once it follows links, and b's
+    # landing page and first form stay held back
+    followed = []
+    while (link := a.pop()) is not None:
+        followed.append(link)
+    assert len(followed) == 3
+
+    b = frontier.site('b')
+    assert b.visit('http://b/')
+    assert b.claim_form('POST', 'http://b/pay')
+    assert not b.claim_form('POST', 'http://b/other')
+    assert frontier.requests == 6
+
+
+def test_pages_are_not_repeated_across_sites():
+    frontier = CrawlFrontier(budget=12, sites=['a', 'b'])
+    assert frontier.site('a').visit('http://host/page#top')
+    assert not frontier.site('b').visit('HTTP://HOST/page')
+
+
+def async_scraper(portal):
+    async_scraper = pytest.importorskip('async_scraper')
+    scraper = async_scraper.AsyncTGSPDCLScraper(rate_limiter=RateLimiter(default=(1000, 1000)))
+    scraper.websites = portal.websites
+    return scraper
+
+
+@pytest.mark.parametrize('build', [
+    lambda portal: make_scraper(portal, concurrent=False),
+    lambda portal: make_scraper(portal, concurrent=True),
+    async_scraper,
+], ids=['sequential', 'threads', 'async'])
+def test_every_site_is_scraped_when_links_exceed_budget(portal, build):
+    portal.bill_links = 40
+    site_runs = []
+    scraper = build(portal)
+    try:
+        bills = scraper.get_bill_history('1234567', site_runs)
+    finally:
+        getattr(scraper, 'close', lambda: None)()
+
+    assert portal.count('POST', '/billdesk/pay') == 1
+    assert portal.count('POST', '/tgsp/lookup') == 1
+    assert {bill['bill_number'][:2] for bill in bills} == {'TG', 'BD'}
+    assert sum(n for n in portal.hits.values()) == 12
+
+    runs = {run.website: run for run in site_runs}
+    tgsp, billdesk = portal.websites
+    assert runs[billdesk].requests == 2
+    assert runs[tgsp].requests == 10
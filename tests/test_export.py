@@ -0,0 +1,45 @@
+import os
+from datetime import date
+
+import pytest
+
+import app as app_module
+from models import db, BillHistory, ServiceNumber
+
+
+@pytest.fixture
+def export_paths(app, monkeypatch):
+    """Temporary files written for xlsx/parquet exports"""
+    with app.app_context():
+        service_number = ServiceNumber(service_number='1234567')
+        db.session.add(service_number)
+        db.session.flush()
+        db.session.add(BillHistory(service_number_id=service_number.id, bill_number='TS1',
+                                   bill_date=date(2026, 9, 1), amount='450.00', status='Paid'))
+        db.session.commit()
+
+    paths = []
+    write = app_module.export_to_file
+
+    def export_to_file(*args, **kwargs):
+        paths.append(write(*args, **kwargs))
+        return paths[-1]
+
+    monkeypatch.setattr(app_module, 'export_to_file', export_to_file)
+    return paths
+
+
+def test_export_file_is_removed_after_sending(client, export_paths):
+    response = client.get('/export/1234567?format=xlsx')
+    assert response.data.startswith(b'PK')
+    response.close()
+    assert not os.path.exists(export_paths[0])
+
+
+def test_export_file_is_removed_when_response_is_never_read(app, export_paths):
+    with app.test_request_context():
+        response = app_module.export_response(app_module.export_query(['1234567']), 'xlsx', 'bills')
+        assert os.path.exists(export_paths[0])
+        # A client that disconnects before the first chunk
+        response.close()
+    assert not os.path.exists(export_paths[0])
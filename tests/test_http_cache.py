@@ -0,0 +1,64 @@
+import sqlite3
+import time
+
+import pytest
+
+import http_cache
+from http_cache import PageCache
+from ratelimit import RateLimiter
+from scraper import TGSPDCLScraper
+
+
+def stored_keys(cache):
+    with sqlite3.connect(cache.path) as conn:
+        return sorted(key for (key,) in conn.execute('SELECT key FROM page_cache'))
+
+
+def test_expired_entries_are_deleted(tmp_path):
+    cache = PageCache(str(tmp_path / 'pages.db'), max_age=60)
+    cache.put('POST old', None, None, 'a', [])
+    cache.put('POST new', None, None, 'b', [])
+    with sqlite3.connect(cache.path) as conn:
+        conn.execute("UPDATE page_cache SET updated = ? WHERE key = 'POST old'", (time.time() - 120,))
+
+    cache.prune()
+    assert stored_keys(cache) == ['POST new']
+
+
+def test_table_is_capped_to_recently_used_entries(tmp_path, monkeypatch):
+    monkeypatch.setattr(http_cache, 'PRUNE_EVERY', 5)
+    cache = PageCache(str(tmp_path / 'pages.db'), max_entries=3)
+
+    for number in range(5):
+        cache.put(f'POST {number}', None, None, 'hash', [])
+        time.sleep(0.01)
+
+    # The fifth write pruned down to the three most recently written
+    assert stored_keys(cache) == ['POST 2', 'POST 3', 'POST 4']
+    assert cache.get('POST 4') == {'etag': None, 'last_modified': None, 'fingerprint': 'hash', 'extracted': []}
+
+
+def test_old_entries_are_pruned_on_open(tmp_path):
+    path = str(tmp_path / 'pages.db')
+    PageCache(path, max_entries=10).put('GET page', None, None, 'hash', {})
+
+    assert stored_keys(PageCache(path, max_entries=0)) == []
+
+
+@pytest.mark.parametrize('backend', ['thread', 'async'])
+def test_generic_page_bills_are_cached_per_service_number(portal, tmp_path, backend):
+    if backend == 'async':
+        scraper_class = pytest.importorskip('async_scraper').AsyncTGSPDCLScraper
+    else:
+        scraper_class = TGSPDCLScraper
+    scraper = scraper_class(rate_limiter=RateLimiter(default=(1000, 1000)),
+                            page_cache=PageCache(str(tmp_path / 'pages.db')))
+    scraper.websites = [f'{portal.base_url}/generic/']
+    try:
+        for number in ['1000001', '1000002']:
+            bills = scraper.get_bill_history(number)
+            assert bills
+            assert {bill['service_number'] for bill in bills} == {number}
+    finally:
+        if backend == 'async':
+            scraper.close()
@@ -0,0 +1,73 @@
+import os
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateIndex
+
+from exporter import export_query
+from models import db, BillHistory, ServiceNumber
+from queries import bill_query
+from scheduler import latest_bill_status
+
+BILL_DATE_INDEX = 'ix_bill_history_service_number_bill_date'
+
+# Queries that read bills newest first and should be served by the index
+ORDERED_QUERIES = {
+    'bill list': lambda: bill_query(['1234567']),
+    'bill page': lambda: bill_query(['1234567']).where(BillHistory.bill_date < date(2026, 1, 1)).limit(51),
+    'latest bill status': lambda: db.select(ServiceNumber.id, latest_bill_status().label('status')),
+    'export one account': lambda: export_query(['1234567']),
+    'export all accounts': lambda: export_query(),
+}
+
+# Exports order by account first, which PostgreSQL sorts for after the join
+POSTGRESQL_ORDERED_QUERIES = ['bill list', 'bill page', 'latest bill status']
+
+
+def explain(connection, query, prefix):
+    sql = str(query.compile(connection.engine, compile_kwargs={'literal_binds': True}))
+    return '\n'.join(str(row) for row in connection.execute(text(f'{prefix} {sql}')))
+
+
+@pytest.mark.parametrize('name', ORDERED_QUERIES)
+def test_sqlite_plan_uses_bill_date_index(app, name):
+    with app.app_context():
+        plan = explain(db.session.connection(), ORDERED_QUERIES[name](), 'EXPLAIN QUERY PLAN')
+
+    assert BILL_DATE_INDEX in plan
+    assert 'TEMP B-TREE' not in plan
+
+
+def test_postgresql_index_matches_bill_ordering():
+    dialect = postgresql.dialect()
+    [index] = [
+        index for index in BillHistory.__table__.indexes
+        if index.name == BILL_DATE_INDEX and index._ddl_if.dialect == 'postgresql'
+    ]
+
+    ddl = str(CreateIndex(index).compile(dialect=dialect))
+    order_by = str(bill_query(['1234567']).compile(dialect=dialect)).split('ORDER BY')[1]
+
+    assert '(service_number_id, bill_date DESC NULLS LAST, id DESC)' in ddl
+    assert 'bill_history.bill_date DESC NULLS LAST, bill_history.id DESC' in order_by
+
+
+@pytest.mark.skipif(not os.environ.get('TEST_POSTGRESQL_URL'), reason='TEST_POSTGRESQL_URL not set')
+@pytest.mark.parametrize('name', POSTGRESQL_ORDERED_QUERIES)
+def test_postgresql_plan_uses_bill_date_index(app, name):
+    engine = create_engine(os.environ['TEST_POSTGRESQL_URL'])
+    db.metadata.drop_all(engine)
+    db.metadata.create_all(engine)
+    try:
+        with app.app_context(), engine.connect() as connection:
+            # Small tables are cheaper to scan, so make the planner use indexes
+            connection.execute(text('SET enable_seqscan = off'))
+            plan = explain(connection, ORDERED_QUERIES[name](), 'EXPLAIN')
+    finally:
+        db.metadata.drop_all(engine)
+        engine.dispose()
+
+    assert BILL_DATE_INDEX in plan
+    assert 'Sort' not in plan
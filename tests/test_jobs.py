@@ -0,0 +1,97 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+import app as app_module
+from models import db, ScrapingLog, ScrapeLease, ServiceNumber
+
+
+@pytest.fixture
+def scraped(monkeypatch):
+    """Scrapes return one bill per number without touching the network"""
+    numbers = []
+
+    def get_bill_history(service_number, site_runs=None):
+        numbers.append(service_number)
+        return [{'date': '01/09/2026', 'amount': 'Rs. 450.00', 'bill_number': f'TS{service_number}',
+                 'status': 'Paid', 'service_number': service_number, 'source': 'scraped'}]
+
+    monkeypatch.setattr(app_module.scraper, 'get_bill_history', get_bill_history)
+    return numbers
+
+
+def add_task(status, job_id='job1', service_number='1234567', started_at=None):
+    log = ScrapingLog(service_number=service_number, job_id=job_id, status=status, started_at=started_at)
+    db.session.add(log)
+    db.session.commit()
+    return log.id
+
+
+def test_queued_tasks_are_requeued_after_restart(app, client, scraped):
+    with app.app_context():
+        add_task('queued', service_number='1000001')
+        add_task('queued', service_number='1000002')
+        app_module.recover_scrape_tasks()
+    app_module.job_queue.join()
+
+    job = client.get('/api/jobs/job1').get_json()
+    assert job['status'] == 'complete'
+    assert sorted(scraped) == ['1000001', '1000002']
+    assert [number['status'] for number in job['service_numbers']] == ['success', 'success']
+
+
+def test_interrupted_running_task_ends_the_job(app, client):
+    long_ago = datetime.utcnow() - timedelta(minutes=10)
+    with app.app_context():
+        add_task('running', started_at=long_ago)
+
+    job = client.get('/api/jobs/job1').get_json()
+    assert job['status'] == 'complete'
+    assert job['errors'] == {'1234567': app_module.INTERRUPTED_TASK_MESSAGE}
+
+    stream = client.get('/jobs/job1/stream').get_data(as_text=True)
+    assert 'event: done' in stream
+
+
+def test_running_task_with_live_lease_is_left_alone(app, client):
+    long_ago = datetime.utcnow() - timedelta(minutes=10)
+    with app.app_context():
+        add_task('running', started_at=long_ago)
+        add_task('running', service_number='7654321', started_at=datetime.utcnow())
+        db.session.add(ScrapeLease(key='1234567', owner='other', expires_at=datetime.utcnow() + timedelta(minutes=5)))
+        db.session.commit()
+
+    job = client.get('/api/jobs/job1').get_json()
+    assert job['status'] == 'running'
+    assert job['completed'] == 0
+
+
+def test_task_runs_once_when_queued_twice(app, scraped):
+    with app.app_context():
+        log_id = add_task('queued')
+        app_module.run_scrape_task(log_id)
+        app_module.run_scrape_task(log_id)
+        assert db.session.get(ScrapingLog, log_id).status == 'success'
+    assert scraped == ['1234567']
+
+
+def test_tasks_use_service_number_ids_resolved_when_queued(app, client, scraped, monkeypatch):
+    def get_or_create_service_number(service_number):
+        raise AssertionError(f'{service_number} was looked up by a task')
+
+    monkeypatch.setattr(app_module, 'get_or_create_service_number', get_or_create_service_number)
+
+    response = client.post('/scrape', data={'service_numbers': '1000001,1000002'},
+                           headers={'Accept': 'application/json'})
+    with app.app_context():
+        job_id = app_module.queue_scrape_job(['1000003'])
+    app_module.job_queue.join()
+
+    assert client.get(response.get_json()['status_url']).get_json()['status'] == 'complete'
+    with app.app_context():
+        ids = dict(db.session.execute(db.select(ServiceNumber.service_number, ServiceNumber.id)).all())
+        logs = ScrapingLog.query.filter(ScrapingLog.website.is_(None)).all()
+        assert {log.service_number: log.service_number_id for log in logs} == ids
+        assert {log.status for log in logs} == {'success'}
+        assert ScrapingLog.query.filter_by(job_id=job_id).one().status == 'success'
+        assert all(number.last_scraped for number in ServiceNumber.query)
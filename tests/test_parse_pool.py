@@ -0,0 +1,12 @@
+from ratelimit import RateLimiter
+from scraper import TGSPDCLScraper
+
+
+def test_pool_workers_parse_like_inline(portal):
+    inline = TGSPDCLScraper(rate_limiter=RateLimiter(default=(1000, 1000)))
+    pooled = TGSPDCLScraper(rate_limiter=RateLimiter(default=(1000, 1000)), parse_workers=1)
+    inline.websites = pooled.websites = portal.websites
+    try:
+        assert pooled.get_bill_history('1000001') == inline.get_bill_history('1000001')
+    finally:
+        pooled._get_parse_pool().shutdown()
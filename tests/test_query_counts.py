@@ -0,0 +1,75 @@
+import os
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import event
+
+import app as app_module
+from models import db, BillHistory, ScrapingLog, ServiceNumber
+
+# SQL statements each endpoint may run, however many bills are stored
+EXPECTED_QUERIES = {
+    # Account lookup, then the bills
+    '/api/bills/1000000': 2,
+    '/api/bills/1000000?fields=date,amount,raw_data': 2,
+    '/api/bills/1000000?limit=10': 2,
+    '/api/bills/1000000?format=ndjson': 2,
+    # Accounts with their bill counts
+    '/api/service-numbers': 1,
+    '/api/service-numbers?limit=2': 1,
+    # Interrupted task check, the job's tasks, recently scraped accounts
+    # and their bills
+    '/api/jobs/job1': 4,
+    # Account lookup, then the export rows
+    '/export/1000000?format=csv': 2,
+    '/export/1000000?format=xlsx': 2,
+}
+
+
+def add_accounts(bills_per_account, accounts=3):
+    for n in range(accounts):
+        service_number = ServiceNumber(service_number=f'{1000000 + n}')
+        db.session.add(service_number)
+        db.session.flush()
+        db.session.add_all([
+            BillHistory(
+                service_number_id=service_number.id, bill_number=f'TS{n}{i:04d}',
+                bill_date=date(2026, 9, 1) - timedelta(days=30 * i), amount=f'{100 + i}.00',
+                status='Paid', source_website='scraped', raw_data={'row': i}
+            )
+            for i in range(bills_per_account)
+        ])
+        db.session.add(ScrapingLog(service_number=service_number.service_number, job_id='job1',
+                                   status='success', bills_found=bills_per_account))
+    db.session.commit()
+
+
+def count_queries(app, client, url):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    # The first request in a process also recovers left-over scrape tasks
+    app_module._recovered_pid = os.getpid()
+    app_module.result_cache.clear()
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        response = client.get(url)
+        response.get_data()
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return len(statements)
+
+
+@pytest.mark.parametrize('bills_per_account', [2, 60])
+def test_query_count_is_fixed(app, client, bills_per_account):
+    with app.app_context():
+        add_accounts(bills_per_account)
+
+    counts = {url: count_queries(app, client, url) for url in EXPECTED_QUERIES}
+    assert counts == EXPECTED_QUERIES
@@ -0,0 +1,23 @@
+import pytest
+
+from ratelimit import RateLimiter, parse_rate_limits
+
+
+def test_parses_rates_and_bursts():
+    assert parse_rate_limits('Example.com=2:4, billdesk.com=0.5') == {
+        'example.com': (2.0, 4),
+        'billdesk.com': (0.5, 1),
+    }
+
+
+@pytest.mark.parametrize('spec', ['example.com=0', 'example.com=-1:2', 'example.com=1:0', 'example.com=fast'])
+def test_rejects_unusable_limits(spec):
+    with pytest.raises(ValueError, match='example.com'):
+        parse_rate_limits(spec)
+
+
+def test_limiter_rejects_zero_rate():
+    with pytest.raises(ValueError):
+        RateLimiter(limits={'example.com': (0, 1)})
+    with pytest.raises(ValueError):
+        RateLimiter(default=(0, 1))
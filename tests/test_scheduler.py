@@ -0,0 +1,38 @@
+from models import db, ServiceNumber
+from scheduler import RefreshScheduler
+
+
+def make_scheduler(app, queued):
+    def enqueue(numbers):
+        queued.append(list(numbers))
+        return f'job{len(queued)}'
+    return RefreshScheduler(app, enqueue)
+
+
+def add_numbers(*numbers):
+    db.session.add_all([ServiceNumber(service_number=number) for number in numbers])
+    db.session.commit()
+
+
+def test_numbers_claimed_elsewhere_are_not_queued_again(app):
+    queued = []
+    first, second = make_scheduler(app, queued), make_scheduler(app, queued)
+    with app.app_context():
+        add_numbers('1000001', '1000002')
+        selected = first.stale_numbers(10)
+        # Another process claims the same numbers between select and claim
+        assert second.run_once(10) == ('job1', selected)
+
+        now = db.session.execute(db.select(db.func.max(ServiceNumber.last_scheduled))).scalar()
+        assert first.claim(selected, now) == []
+        assert first.run_once(10) == (None, [])
+    assert queued == [selected]
+
+
+def test_zero_limit_queues_nothing(app):
+    queued = []
+    with app.app_context():
+        add_numbers('1000001')
+        assert make_scheduler(app, queued).run_once(0) == (None, [])
+        assert db.session.execute(db.select(ServiceNumber.last_scheduled)).scalar() is None
+    assert queued == []
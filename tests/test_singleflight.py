@@ -0,0 +1,37 @@
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from models import db, ScrapeLease
+from singleflight import SingleFlight, LeaseWaitTimeout
+
+
+def hold_lease(key, seconds=300):
+    """Leave a lease on key as if another process were scraping it"""
+    db.session.add(ScrapeLease(key=key, owner='other', expires_at=datetime.utcnow() + timedelta(seconds=seconds)))
+    db.session.commit()
+
+
+def test_lease_is_renewed_while_work_runs(app):
+    flights = SingleFlight(lease_seconds=0.3, poll_seconds=0.05, max_wait_seconds=0.2)
+    rival = SingleFlight(lease_seconds=0.3, poll_seconds=0.05, max_wait_seconds=0.2)
+    with app.app_context():
+        def slow():
+            time.sleep(0.45)
+            # The lease would have expired by now without renewal, letting a rival in
+            return rival.run('1234567', lambda: 'duplicate', on_timeout=lambda: 'waited')[0]
+
+        assert flights.run('1234567', slow) == ('waited', False)
+        assert db.session.get(ScrapeLease, '1234567') is None
+
+
+def test_waiting_on_a_held_lease_is_bounded(app):
+    flights = SingleFlight(poll_seconds=0.05, max_wait_seconds=0.2)
+    calls = []
+    with app.app_context():
+        hold_lease('1234567')
+        assert flights.run('1234567', lambda: calls.append(1), on_timeout=lambda: 'fallback') == ('fallback', False)
+        with pytest.raises(LeaseWaitTimeout):
+            flights.run('1234567', lambda: calls.append(1))
+    assert calls == []
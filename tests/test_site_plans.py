@@ -0,0 +1,24 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from site_plans import SitePlan, SitePlanCache
+
+
+def test_concurrent_misses_build_once_and_release_their_lock():
+    cache = SitePlanCache()
+    builds = []
+    lock = threading.Lock()
+
+    def builder(url):
+        with lock:
+            builds.append(url)
+        time.sleep(0.05)
+        return SitePlan(url, [], [])
+
+    with ThreadPoolExecutor(8) as workers:
+        plans = list(workers.map(lambda url: cache.get_or_build(url, builder), ['http://a/'] * 4 + ['http://b/'] * 4))
+
+    assert sorted(builds) == ['http://a/', 'http://b/']
+    assert len({id(plan) for plan in plans}) == 2
+    assert cache._build_locks == {}